@@ -47,7 +47,26 @@ from IPython.display import display, HTML
 # ================================
 # Local / project imports
 # ================================
+import llm_cache
+import llm_scheduler
+import replay
+import report_renderer
 import research_tools
+import tracing
+from research_agent.prompts import (
+    FUSED_SYSTEM_PROMPT,
+    FUSED_USER_PROMPT,
+    HTML_SYSTEM_PROMPT,
+    HTML_USER_PROMPT,
+    REFLECTION_SYSTEM_PROMPT,
+    REFLECTION_USER_PROMPT,
+)
+from research_agent.run import ResearchRun
+from model_routing import ModelRouter
+from query_planner import fan_out_calls, plan_queries
+from run_budget import RunBudget
+from tool_executor import ToolExecutor
+from tool_projection import full_result_tool
 
 # ================================
 # Environment setup
@@ -61,6 +80,22 @@ CLIENT = OpenAI(
     base_url="https://generativelanguage.googleapis.com/v1beta/openai/"
 )
 
+# Optional shared RPM/TPM scheduler with priorities (set LLM_RPM / LLM_TPM); installed
+# before the response cache so cache hits do not consume quota
+LLM_SCHEDULER = llm_scheduler.install_from_env(CLIENT)
+
+# Optional exact-match response cache for development runs (set LLM_CACHE=memory or a file path)
+LLM_CACHE = llm_cache.install_from_env(CLIENT)
+
+# Optional record/replay of arXiv, DuckDuckGo and LLM calls for offline runs (set REPLAY_CASSETTE)
+CASSETTE = replay.install_from_env(CLIENT)
+
+# Record every LLM call as a span (installed last so it sees cache hits and replays)
+tracing.install(CLIENT)
+
+# Model per pipeline stage (MODEL_PLAN, MODEL_SYNTHESIS, MODEL_REFLECTION, MODEL_HTML; default gemini-2.0-flash-exp)
+MODEL_ROUTER = ModelRouter.from_env()
+
 
 # In[ ]:
 
@@ -133,8 +168,15 @@ for item in web_results:
 TOOL_MAPPING = {
     "web_search_tool": research_tools.web_search_tool,
     "arxiv_search_tool": research_tools.arxiv_search_tool,
+    "arxiv_fetch_tool": research_tools.arxiv_fetch_tool,
+    "local_paper_search_tool": research_tools.local_paper_search_tool,
+    "pdf_text_tool": research_tools.pdf_text_tool,
+    "full_result_tool": full_result_tool,
 }
 
+# Runs the tool calls of a single turn concurrently (bounded pool, per-tool limits, per-call timeout)
+TOOL_EXECUTOR = ToolExecutor(TOOL_MAPPING, max_workers=8, timeout=60)
+
 
 # ## Exercise 1: Generate Research Report with Tools
 # **Goal:** Implement `generate_research_report_with_tools(prompt)`.
@@ -182,79 +224,87 @@ TOOL_MAPPING = {
 
 
 # GRADED FUNCTION: generate_research_report_with_tools
-def generate_research_report_with_tools(prompt: str, model: str = "gemini-2.0-flash-exp") -> str:
+@tracing.traced("research")
+def generate_research_report_with_tools(prompt: str, model: str | None = None, budget: RunBudget | None = None, plan: bool = False) -> str:
     """
     Generates a research report using OpenAI's tool-calling with arXiv and web tools.
 
     Args:
         prompt (str): The user prompt.
-        model (str): OpenAI model name.
+        model (str | None): Model for every turn; None routes planning and synthesis turns via MODEL_ROUTER.
+        budget (RunBudget | None): Deadline, tool-call and token limits (default: RunBudget.from_env()).
+        plan (bool): Plan sub-queries in one call and search them in parallel before the first turn.
 
     Returns:
         str: Final assistant research report text.
     """
-    messages = [
-        {
-            "role": "system",
-            "content": (
-                "You are a research assistant that can search the web and arXiv to write detailed, "
-                "accurate, and properly sourced research reports.\n\n"
-                "🔍 Use tools when appropriate (e.g., to find scientific papers or web content).\n"
-                "📚 Cite sources whenever relevant. Do NOT omit citations for brevity.\n"
-                "🌐 When possible, include full URLs (arXiv links, web sources, etc.).\n"
-                "✍️ Use an academic tone, organize output into clearly labeled sections, and include "
-                "inline citations or footnotes as needed.\n"
-                "🚫 Do not include placeholder text such as '(citation needed)' or '(citations omitted)'."
-            )
-        },
-        {"role": "user", "content": prompt}
-    ]
-
-    # List of available tools
-    tools = [research_tools.arxiv_tool_def, research_tools.web_search_tool_def]
-
-    # Maximum number of turns
-    max_turns = 10
+    # Deadline, tool-call and token limits for this run
+    budget = budget or RunBudget.from_env()
+
+    # Cheap model for tool-planning turns, strong model for the report
+    router = ModelRouter(model) if model else MODEL_ROUTER
+
+    # Per-run state shared with the library pipelines (research_agent/run.py): the system
+    # prompt and tools, result projection, the search memo, cross-tool deduplication,
+    # compaction of older results, budget charging and model escalation
+    run = ResearchRun(prompt, router, budget, TOOL_MAPPING)
+    messages = run.messages
+    tools = run.tools
+
+    # Optional planning stage: sub-queries from one call, searched in parallel and seeded into the history
+    if plan:
+        queries, plan_response = plan_queries(CLIENT, prompt, router.model("plan"))
+        budget.charge(plan_response)
+        print(f"🧭 Planned queries: {queries}")
+        run.tool_results(*fan_out_calls(queries), TOOL_EXECUTOR, planned=True)
     
     # Iterate for max_turns iterations
-    for _ in range(max_turns):
+    for turn in range(run.max_turns):
+
+        # Compacts older tool results and decides whether this is the final (tool-free) turn
+        turn_model = run.turn_request(turn)["model"]
+        final_turn = run.final_turn
+        if final_turn:
+            print("⏱️ Requesting the final report.")
 
         ### START CODE HERE ###
 
         # Chat with the LLM via the client and set the correct arguments. Hint: Their names match names of variables already defined.
         # Make sure to let the LLM choose tools automatically. Hint: Look at the docs provided earlier!
         response = CLIENT.chat.completions.create( 
-            model=model,
+            model=turn_model,
             messages=messages,
             tools=tools,
-            tool_choice="auto",
+            tool_choice="none" if final_turn else "auto",
             temperature=1, 
         ) 
 
         ### END CODE HERE ###
 
-        # Get the response from the LLM and append to messages
-        msg = response.choices[0].message 
-        messages.append(msg) 
+        # The planning model wrote the answer or produced malformed tool calls: redo the turn with the synthesis model
+        retry = run.review(response)
+        if retry is not None:
+            response = CLIENT.chat.completions.create(**retry)
+            run.review(response)
 
-        # Stop when the assistant returns a final answer (no tool calls)
-        if not msg.tool_calls:      
-            final_text = msg.content
+        # Append the message; None means it is the final answer (no tool calls, or tools were disabled)
+        tool_calls = run.accept(response)
+        if tool_calls is None:
+            final_text = run.final_text
             print("✅ Final answer:")
             print(final_text)
             break
 
-        # Execute tool calls and append results
-        for call in msg.tool_calls:
-            tool_name = call.function.name
-            args = json.loads(call.function.arguments)
+        calls, call_ids = tool_calls
+        for tool_name, args in calls:
             print(f"🛠️ {tool_name}({args})")
 
-            try:
-                tool_func = TOOL_MAPPING[tool_name]
-                result = tool_func(**args)
-            except Exception as e:
-                result = {"error": str(e)}
+        # Execute tool calls concurrently; results come back in the original call order.
+        # Calls beyond the tool-call budget are answered with an error instead of running.
+        results = run.tool_results(calls, call_ids, TOOL_EXECUTOR)
+
+        # Append results
+        for call, (tool_name, _), result in zip(response.choices[0].message.tool_calls, calls, results):
 
             ### START CODE HERE ###
 
@@ -276,7 +326,7 @@ def generate_research_report_with_tools(prompt: str, model: str = "gemini-2.0-fl
             # Append to messages
             messages.append(new_msg)
 
-    return final_text
+    return run.final_text
 
 
 # Run the following cell to check the correctness of your code. It might take a while so don't worry if it takes a couple of minutes to run:
@@ -314,7 +364,8 @@ unittests.test_generate_research_report_with_tools(generate_research_report_with
 
 
 # GRADED FUNCTION: reflection_and_rewrite
-def reflection_and_rewrite(report, model: str = "gemini-2.0-flash-exp", temperature: float = 0.3) -> dict:
+@tracing.traced("reflection")
+def reflection_and_rewrite(report, model: str | None = None, temperature: float = 0.3, stream: bool = False) -> dict:
     """
     Generates a structured reflection AND a revised research report.
     Accepts raw text OR the messages list returned by generate_research_report_with_tools.
@@ -323,27 +374,21 @@ def reflection_and_rewrite(report, model: str = "gemini-2.0-flash-exp", temperat
         dict with keys:
           - "reflection": structured reflection text
           - "revised_report": improved version of the input report
+        With stream=True, a research_tools.ReflectionStream instead: iterating it
+        yields the revised report text as it arrives, and its `result` attribute
+        holds the dict above once iteration is done.
     """
 
     # Input can be plain text or a list of messages, this function detects and parses accordingly
     report = research_tools.parse_input(report)
+    model = MODEL_ROUTER.resolve(model, "reflection")
 
     ### START CODE HERE ###
 
-    # Define the prompt. A multi-line f-string is typically used for this.
+    # Define the prompt from the REFLECTION_USER_PROMPT template shared with research_agent.
     # Remember it should ask the model to output ONLY valid JSON with this structure:
     # {{ "reflection": "<text>", "revised_report": "<text>" }}
-    user_prompt = f"""
-    Review the following report and generate a reflection and a revised version.
-    Return ONLY valid JSON with the following structure:
-    {{
-        "reflection": "Your reflection here. MUST include the following 4 sections: 'Strengths:', 'Limitations:', 'Suggestions:', 'Opportunities:'.",
-        "revised_report": "Your revised report here"
-    }}
-
-    Report:
-    {report}
-    """
+    user_prompt = REFLECTION_USER_PROMPT.format(report=report)
 
     # Get a response from the LLM
     response = CLIENT.chat.completions.create( 
@@ -351,43 +396,26 @@ def reflection_and_rewrite(report, model: str = "gemini-2.0-flash-exp", temperat
         model=model,
         messages=[ 
             # System prompt is already defined
-            {"role": "system", "content": "You are an academic reviewer and editor."},
+            {"role": "system", "content": REFLECTION_SYSTEM_PROMPT},
             # Add user prompt
             {"role": "user", "content": user_prompt},
         ],
         # Set the temperature equal to the temperature parameter passed to the function
-        temperature=temperature
+        temperature=temperature,
+        stream=stream
     )
 
     ### END CODE HERE ###
 
+    # Streaming mode: hand back the revised report as it arrives (the span ends once it has been read)
+    if stream:
+        return research_tools.ReflectionStream(tracing.until_consumed(response))
+
     # Extract output
     llm_output = response.choices[0].message.content.strip()
 
-    # Clean up markdown code blocks if present
-    if llm_output.startswith("```json"):
-        llm_output = llm_output[7:]
-    if llm_output.startswith("```"):
-        llm_output = llm_output[3:]
-    if llm_output.endswith("```"):
-        llm_output = llm_output[:-3]
-    
-    llm_output = llm_output.strip()
-
-    # Check if output is valid JSON
-    try:
-        data = json.loads(llm_output)
-    except json.JSONDecodeError:
-        # Fallback: try to find the start and end of the JSON object
-        try:
-            start = llm_output.find("{")
-            end = llm_output.rfind("}") + 1
-            if start != -1 and end != -1:
-                data = json.loads(llm_output[start:end])
-            else:
-                raise
-        except:
-             raise Exception(f"The output of the LLM was not valid JSON. Output: {llm_output[:100]}...")
+    # Clean up markdown code blocks if present and parse the JSON object
+    data = research_tools.parse_json_output(llm_output)
 
     return {
         "reflection": str(data.get("reflection", "")).strip(),
@@ -423,22 +451,33 @@ unittests.test_reflection_and_rewrite(reflection_and_rewrite)
 
 
 # GRADED FUNCTION: convert_report_to_html
-def convert_report_to_html(report, model: str = "gemini-2.0-flash-exp", temperature: float = 0.5) -> str:
+@tracing.traced("html")
+def convert_report_to_html(report, model: str | None = None, temperature: float = 0.5, stream: bool = False, local_render: bool = True) -> str:
     """
     Converts a plaintext research report into a styled HTML page using OpenAI.
     Accepts raw text OR the messages list from the tool-calling step.
+    With stream=True, returns a generator of HTML chunks as they arrive.
+    With local_render=True, reports that already use Markdown structure are
+    rendered locally and the LLM is only used for unstructured text.
     """
 
     # Input can be plain text or a list of messages, this function detects and parses accordingly
     report = research_tools.parse_input(report)
 
+    # Fast path: standard Markdown needs no LLM round trip
+    if local_render and report_renderer.is_markdown_report(report):
+        html = report_renderer.render_report_html(report)
+        return iter([html]) if stream else html
+
+    model = MODEL_ROUTER.resolve(model, "html")
+
     # System prompt is already provided
-    system_prompt = "You convert plaintext reports into full clean HTML documents."
+    system_prompt = HTML_SYSTEM_PROMPT
 
     ### START CODE HERE ###
     
     # Build the user prompt instructing the model to return ONLY valid HTML
-    user_prompt = f"Convert the following research report into a full, clean HTML document. Return ONLY the HTML code, no markdown backticks or explanations.\n\nReport:\n{report}"
+    user_prompt = HTML_USER_PROMPT.format(report=report)
 
     # Call the LLM by interacting with the CLIENT. 
     # Remember to set the correct values for the model, messages (system and user prompts) and temperature
@@ -448,11 +487,16 @@ def convert_report_to_html(report, model: str = "gemini-2.0-flash-exp", temperat
             {"role": "system", "content": system_prompt},
             {"role": "user", "content": user_prompt}
         ],
-        temperature=temperature
+        temperature=temperature,
+        stream=stream
     )
 
     ### END CODE HERE ###
 
+    # Streaming mode: yield HTML chunks as they arrive (the span ends once they have been read)
+    if stream:
+        return tracing.until_consumed(research_tools.iter_stream_text(response))
+
     # Extract the HTML from the assistant message
     html = response.choices[0].message.content.strip()  
 
@@ -466,6 +510,52 @@ def convert_report_to_html(report, model: str = "gemini-2.0-flash-exp", temperat
 unittests.test_convert_report_to_html(convert_report_to_html)
 
 
+# ### ⚡ Optional: Fused Reflection + HTML
+# 
+# `reflection_and_rewrite` and `convert_report_to_html` each send the full report to the model, so the revised text is paid for twice. `reflect_and_render` asks for the reflection, the revised report and its HTML in a single completion. The separate functions above are still available when you only need one of the steps.
+
+# In[ ]:
+
+
+@tracing.traced("reflect_and_render")
+def reflect_and_render(report, model: str | None = None, temperature: float = 0.3) -> dict:
+    """
+    Reflects on a report, rewrites it and renders the rewrite as HTML in one LLM call.
+    Accepts raw text OR the messages list returned by generate_research_report_with_tools.
+
+    Returns:
+        dict with keys "reflection", "revised_report" and "html".
+    """
+    report = research_tools.parse_input(report)
+    model = MODEL_ROUTER.resolve(model, "reflection")
+
+    user_prompt = FUSED_USER_PROMPT.format(report=report)
+
+    response = CLIENT.chat.completions.create(
+        model=model,
+        messages=[
+            {"role": "system", "content": FUSED_SYSTEM_PROMPT},
+            {"role": "user", "content": user_prompt},
+        ],
+        temperature=temperature
+    )
+
+    data = research_tools.parse_json_output(response.choices[0].message.content)
+
+    revised_report = str(data.get("revised_report", "")).strip()
+    html = str(data.get("html", "")).strip()
+
+    # If the model skipped the HTML, render the revised report locally rather than paying for another call
+    if not html:
+        html = report_renderer.render_report_html(revised_report)
+
+    return {
+        "reflection": str(data.get("reflection", "")).strip(),
+        "revised_report": revised_report,
+        "html": html,
+    }
+
+
 # ### 🚀 End-to-End Pipeline
 # 
 # Run this cell to execute the full workflow:
@@ -0,0 +1,214 @@
+# ================================
+# Standard library imports
+# ================================
+import asyncio
+
+# ================================
+# Local / project imports
+# ================================
+import report_renderer
+import research_tools
+import tracing
+from research_agent.client import get_async_client, get_router
+from research_agent.prompts import (
+    FUSED_SYSTEM_PROMPT,
+    FUSED_USER_PROMPT,
+    HTML_SYSTEM_PROMPT,
+    HTML_USER_PROMPT,
+    REFLECTION_SYSTEM_PROMPT,
+    REFLECTION_USER_PROMPT,
+)
+from research_agent.run import ResearchRun
+from model_routing import ModelRouter
+from query_planner import async_plan_queries, fan_out_calls
+from run_budget import RunBudget
+from tool_executor import AsyncToolExecutor
+from tool_projection import full_result_tool
+
+ASYNC_TOOL_MAPPING = {
+    "web_search_tool": research_tools.async_web_search_tool,
+    "arxiv_search_tool": research_tools.async_arxiv_search_tool,
+    "arxiv_fetch_tool": research_tools.async_arxiv_fetch_tool,
+    "local_paper_search_tool": research_tools.local_paper_search_tool,
+    "pdf_text_tool": research_tools.async_pdf_text_tool,
+    "full_result_tool": full_result_tool,
+}
+
+ASYNC_TOOL_EXECUTOR = AsyncToolExecutor(ASYNC_TOOL_MAPPING, timeout=60)
+
+
+@tracing.traced("research")
+async def generate_research_report_with_tools(
+    prompt: str, model: str | None = None, budget: RunBudget | None = None, plan: bool = False
+) -> str:
+    """
+    Async version of generate_research_report_with_tools.
+
+    Args:
+        prompt (str): The user prompt.
+        model (str | None): Model for every turn; None routes planning and synthesis turns via get_router().
+        budget (RunBudget | None): Deadline, tool-call and token limits (default: RunBudget.from_env()).
+        plan (bool): Plan sub-queries in one call and search them in parallel before the first turn.
+
+    Returns:
+        str: Final assistant research report text.
+    """
+    budget = budget or RunBudget.from_env()
+    router = ModelRouter(model) if model else get_router()
+    run = ResearchRun(prompt, router, budget, ASYNC_TOOL_MAPPING)
+
+    # Planning stage: searches for the planned sub-queries run in parallel before the first turn
+    if plan:
+        queries, plan_response = await async_plan_queries(get_async_client(), prompt, router.model("plan"))
+        budget.charge(plan_response)
+        await run.async_run_tools(*fan_out_calls(queries), ASYNC_TOOL_EXECUTOR, planned=True)
+
+    for turn in range(run.max_turns):
+        response = await get_async_client().chat.completions.create(**run.turn_request(turn))
+        # Malformed tool calls or a drafted answer from the planning model: redo with the synthesis model
+        retry = run.review(response)
+        if retry is not None:
+            response = await get_async_client().chat.completions.create(**retry)
+            run.review(response)
+
+        tool_calls = run.accept(response)
+        if tool_calls is None:
+            break
+        await run.async_run_tools(*tool_calls, ASYNC_TOOL_EXECUTOR)
+
+    return run.final_text
+
+
+@tracing.traced("reflection")
+async def reflection_and_rewrite(report, model: str | None = None, temperature: float = 0.3) -> dict:
+    """
+    Async version of reflection_and_rewrite.
+
+    Returns:
+        dict with keys "reflection" and "revised_report".
+    """
+    report = research_tools.parse_input(report)
+    model = get_router().resolve(model, "reflection")
+
+    response = await get_async_client().chat.completions.create(
+        model=model,
+        messages=[
+            {"role": "system", "content": REFLECTION_SYSTEM_PROMPT},
+            {"role": "user", "content": REFLECTION_USER_PROMPT.format(report=report)},
+        ],
+        temperature=temperature,
+    )
+
+    data = research_tools.parse_json_output(response.choices[0].message.content)
+
+    return {
+        "reflection": str(data.get("reflection", "")).strip(),
+        "revised_report": str(data.get("revised_report", "")).strip(),
+    }
+
+
+@tracing.traced("html")
+async def convert_report_to_html(report, model: str | None = None, temperature: float = 0.5, local_render: bool = True) -> str:
+    """
+    Async version of convert_report_to_html.
+    """
+    report = research_tools.parse_input(report)
+
+    # Fast path: standard Markdown needs no LLM round trip
+    if local_render and report_renderer.is_markdown_report(report):
+        return report_renderer.render_report_html(report)
+
+    model = get_router().resolve(model, "html")
+
+    response = await get_async_client().chat.completions.create(
+        model=model,
+        messages=[
+            {"role": "system", "content": HTML_SYSTEM_PROMPT},
+            {"role": "user", "content": HTML_USER_PROMPT.format(report=report)},
+        ],
+        temperature=temperature,
+    )
+
+    return response.choices[0].message.content.strip()
+
+
+@tracing.traced("reflect_and_render")
+async def reflect_and_render(report, model: str | None = None, temperature: float = 0.3) -> dict:
+    """
+    Async version of reflect_and_render: reflection, revised report and HTML
+    from a single completion.
+
+    Returns:
+        dict with keys "reflection", "revised_report" and "html".
+    """
+    report = research_tools.parse_input(report)
+    model = get_router().resolve(model, "reflection")
+
+    response = await get_async_client().chat.completions.create(
+        model=model,
+        messages=[
+            {"role": "system", "content": FUSED_SYSTEM_PROMPT},
+            {"role": "user", "content": FUSED_USER_PROMPT.format(report=report)},
+        ],
+        temperature=temperature,
+    )
+
+    data = research_tools.parse_json_output(response.choices[0].message.content)
+
+    revised_report = str(data.get("revised_report", "")).strip()
+    html = str(data.get("html", "")).strip() or report_renderer.render_report_html(revised_report)
+
+    return {
+        "reflection": str(data.get("reflection", "")).strip(),
+        "revised_report": revised_report,
+        "html": html,
+    }
+
+
+@tracing.traced("pipeline")
+async def run_pipeline(prompt: str, model: str | None = None, fused: bool = False, plan: bool = False) -> dict:
+    """
+    Runs research → reflection → HTML for a single prompt. With fused=True the
+    last two stages share one completion (see reflect_and_render).
+
+    Returns:
+        dict with keys "prompt", "report", "reflection", "revised_report" and "html".
+    """
+    report = await generate_research_report_with_tools(prompt, model=model, plan=plan)
+    if fused:
+        reflection = await reflect_and_render(report, model=model)
+        html = reflection["html"]
+    else:
+        reflection = await reflection_and_rewrite(report, model=model)
+        html = await convert_report_to_html(reflection["revised_report"], model=model)
+
+    return {
+        "prompt": prompt,
+        "report": report,
+        "reflection": reflection["reflection"],
+        "revised_report": reflection["revised_report"],
+        "html": html,
+    }
+
+
+async def run_prompts(
+    prompts: list[str], concurrency: int = 8, model: str | None = None, fused: bool = False, plan: bool = False
+) -> list[dict]:
+    """
+    Runs the full pipeline for many prompts on one event loop, with at most
+    `concurrency` pipelines in flight at a time.
+
+    Returns:
+        list[dict]: One result per prompt, in input order. A failed prompt yields
+        {"prompt": ..., "error": ...} instead of stopping the batch.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run_one(prompt: str) -> dict:
+        async with semaphore:
+            try:
+                return await run_pipeline(prompt, model=model, fused=fused, plan=plan)
+            except Exception as e:
+                return {"prompt": prompt, "error": f"{type(e).__name__}: {e}"}
+
+    return await asyncio.gather(*(run_one(prompt) for prompt in prompts))
@@ -0,0 +1,210 @@
+"""
+Batch entry point: runs research → reflection → HTML for every prompt in a
+JSONL file and writes results as they complete.
+
+Usage:
+    python batch_run.py prompts.jsonl --out results.jsonl --workers 8
+    python batch_run.py prompts.jsonl --out-dir reports/
+
+Each input line is either a JSON string or an object with a "prompt" key and
+an optional "id" (or "request_id"). Malformed lines are reported and written
+as {"id", "error"} results; the rest of the batch still runs.
+"""
+
+# ================================
+# Standard library imports
+# ================================
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import time
+
+# ================================
+# Local / project imports
+# ================================
+import async_pipeline
+import tracing
+
+STAGES = ("research", "reflection", "html", "reflect_and_render")
+
+
+def iter_prompts(path: str):
+    """
+    Streams (id, prompt) pairs from a JSONL file, skipping blank lines.
+
+    A line that is not valid JSON, or has no "prompt" string, yields an
+    {"id", "error"} record instead, so one bad line cannot abort the batch.
+    """
+    with open(path, encoding="utf-8") as f:
+        for line_no, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                item = json.loads(line)
+            except ValueError as e:
+                yield {"id": str(line_no), "error": f"Line {line_no}: invalid JSON ({e})"}
+                continue
+            if isinstance(item, str):
+                yield str(line_no), item
+                continue
+            prompt_id = (item.get("id") or item.get("request_id")) if isinstance(item, dict) else None
+            prompt_id = str(prompt_id or line_no)
+            if isinstance(item, dict) and isinstance(item.get("prompt"), str):
+                yield prompt_id, item["prompt"]
+            else:
+                yield {"id": prompt_id, "error": f'Line {line_no}: expected a JSON string or an object with a "prompt" string'}
+
+
+class ResultWriter:
+    """
+    Writes each finished result immediately, either as a line in a JSONL file
+    or as <id>.json + <id>.html in an output directory.
+    """
+
+    def __init__(self, out: str | None = None, out_dir: str | None = None):
+        self.out_dir = out_dir
+        self._file = None
+        if out_dir:
+            os.makedirs(out_dir, exist_ok=True)
+        else:
+            self._file = open(out or "results.jsonl", "a", encoding="utf-8")
+
+    def write(self, result: dict):
+        if self._file is not None:
+            self._file.write(json.dumps(result) + "\n")
+            self._file.flush()
+            return
+
+        safe_id = "".join(c if c.isalnum() or c in "-_" else "_" for c in result["id"])
+        with open(os.path.join(self.out_dir, f"{safe_id}.json"), "w", encoding="utf-8") as f:
+            json.dump({k: v for k, v in result.items() if k != "html"}, f, indent=2)
+        if result.get("html"):
+            with open(os.path.join(self.out_dir, f"{safe_id}.html"), "w", encoding="utf-8") as f:
+                f.write(result["html"])
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+
+
+async def process_prompt(prompt_id: str, prompt: str, model: str | None, fused: bool = False, plan: bool = False) -> dict:
+    """
+    Runs the pipeline stages for one prompt, timing each of them.
+    """
+    result = {"id": prompt_id, "prompt": prompt, "timings": {}}
+    try:
+        start = time.perf_counter()
+        report = await async_pipeline.generate_research_report_with_tools(prompt, model=model, plan=plan)
+        result["timings"]["research"] = time.perf_counter() - start
+        result["report"] = report
+
+        if fused:
+            start = time.perf_counter()
+            result.update(await async_pipeline.reflect_and_render(report, model=model))
+            result["timings"]["reflect_and_render"] = time.perf_counter() - start
+            return result
+
+        start = time.perf_counter()
+        reflection = await async_pipeline.reflection_and_rewrite(report, model=model)
+        result["timings"]["reflection"] = time.perf_counter() - start
+        result.update(reflection)
+
+        start = time.perf_counter()
+        result["html"] = await async_pipeline.convert_report_to_html(reflection["revised_report"], model=model)
+        result["timings"]["html"] = time.perf_counter() - start
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+    return result
+
+
+async def run_batch(
+    path: str,
+    writer: ResultWriter,
+    workers: int = 8,
+    model: str | None = None,
+    fused: bool = False,
+    plan: bool = False,
+) -> list[dict]:
+    """
+    Feeds prompts from `path` to a pool of `workers` coroutines through a
+    bounded queue, so the input is never loaded into memory all at once.
+
+    Returns:
+        list[dict]: The "id", "timings" and (if any) "error" of every processed prompt.
+    """
+    queue = asyncio.Queue(maxsize=workers * 2)
+    summaries = []
+
+    async def worker():
+        while True:
+            item = await queue.get()
+            if item is None:
+                return
+            result = await process_prompt(*item, model=model, fused=fused, plan=plan)
+            writer.write(result)
+            summaries.append({k: result[k] for k in ("id", "timings", "error") if k in result})
+            status = "❌" if "error" in result else "✅"
+            print(f"{status} {result['id']} ({sum(result['timings'].values()):.1f}s)")
+
+    tasks = [asyncio.create_task(worker()) for _ in range(workers)]
+    for item in iter_prompts(path):
+        if isinstance(item, dict):
+            # Malformed input line: record it and keep going
+            writer.write(item)
+            summaries.append({**item, "timings": {}})
+            print(f"❌ {item['id']}: {item['error']}")
+            continue
+        await queue.put(item)
+    for _ in tasks:
+        await queue.put(None)
+    await asyncio.gather(*tasks)
+    return summaries
+
+
+def print_report(summaries: list[dict], elapsed: float):
+    failed = sum(1 for s in summaries if "error" in s)
+    print("\n=== Batch summary ===")
+    print(f"Prompts   : {len(summaries)} ({len(summaries) - failed} ok, {failed} failed)")
+    print(f"Wall time : {elapsed:.1f}s")
+    if elapsed > 0:
+        print(f"Throughput: {len(summaries) / elapsed * 60:.2f} prompts/min")
+    for stage in STAGES:
+        times = sorted(s["timings"][stage] for s in summaries if stage in s["timings"])
+        if not times:
+            continue
+        p95 = times[min(len(times) - 1, int(0.95 * len(times)))]
+        print(
+            f"{stage:<18}: mean {statistics.mean(times):.2f}s | p50 {statistics.median(times):.2f}s "
+            f"| p95 {p95:.2f}s | max {times[-1]:.2f}s"
+        )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the research pipeline over a JSONL file of prompts.")
+    parser.add_argument("input", help="JSONL file with one prompt per line")
+    parser.add_argument("--out", default="results.jsonl", help="output JSONL file (appended to)")
+    parser.add_argument("--out-dir", help="write <id>.json and <id>.html files here instead of --out")
+    parser.add_argument("--workers", type=int, default=8, help="number of prompts processed concurrently")
+    parser.add_argument("--model", default=None, help="model for every stage (default: per-stage MODEL_* variables)")
+    parser.add_argument("--fused", action="store_true", help="reflect and render HTML in a single LLM call")
+    parser.add_argument("--plan", action="store_true", help="plan sub-queries and search them in parallel before the first turn")
+    parser.add_argument("--metrics", help="write Prometheus-format metrics to this file at the end")
+    args = parser.parse_args(argv)
+
+    writer = ResultWriter(out=args.out, out_dir=args.out_dir)
+    start = time.perf_counter()
+    try:
+        summaries = asyncio.run(run_batch(args.input, writer, workers=args.workers, model=args.model, fused=args.fused, plan=args.plan))
+    finally:
+        writer.close()
+    print_report(summaries, time.perf_counter() - start)
+    if args.metrics:
+        with open(args.metrics, "w", encoding="utf-8") as f:
+            f.write(tracing.METRICS.to_prometheus())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+# ================================
+# Standard library imports
+# ================================
+import json
+import re
+
+# ================================
+# Local / project imports
+# ================================
+import tracing
+from tool_projection import estimate_tokens
+
+# Fields that carry a record's free text, in order of preference
+TEXT_FIELDS = ("summary", "content", "text")
+
+
+def _as_dict(message) -> dict:
+    return message.model_dump(exclude_none=True) if hasattr(message, "model_dump") else message
+
+
+def _role(message) -> str | None:
+    return message.get("role") if isinstance(message, dict) else getattr(message, "role", None)
+
+
+def messages_tokens(messages: list) -> int:
+    """
+    Estimated prompt size of a message history.
+    """
+    return estimate_tokens(json.dumps([_as_dict(m) for m in messages], default=str))
+
+
+def _gist(text: str, max_chars: int) -> str:
+    text = " ".join(text.split())
+    sentence = re.split(r"(?<=[.!?])\s", text, maxsplit=1)[0]
+    if len(sentence) <= max_chars:
+        return sentence
+    return sentence[:max_chars].rsplit(" ", 1)[0] + " …"
+
+
+def digest(content: str, gist_chars: int = 160) -> str:
+    """
+    Citation-preserving digest of a tool message's content: every record keeps
+    its title and URL (and duplicate_of / also_at links) plus a one-sentence gist.
+    """
+    try:
+        data = json.loads(content)
+    except (TypeError, ValueError):
+        return _gist(str(content), gist_chars * 2)
+
+    if isinstance(data, dict) and data.get("compacted"):
+        return content
+    records = data.get("results") if isinstance(data, dict) else data
+    if not isinstance(records, list):
+        return content
+
+    compact = []
+    for record in records:
+        if not isinstance(record, dict) or "error" in record:
+            compact.append(record)
+            continue
+        entry = {k: record[k] for k in ("title", "url", "duplicate_of", "also_at") if record.get(k)}
+        text = next((record[f] for f in TEXT_FIELDS if isinstance(record.get(f), str) and record[f]), None)
+        if text:
+            entry["gist"] = _gist(text, gist_chars)
+        compact.append(entry)
+
+    result = {"compacted": True, "results": compact}
+    if isinstance(data, dict) and data.get("result_id"):
+        result["result_id"] = data["result_id"]
+    return json.dumps(result)
+
+
+class ContextCompactor:
+    """
+    Rolling compaction of a tool-calling conversation.
+
+    Once the history passes `max_tokens`, the content of older tool messages is
+    replaced, oldest turn first, by digest() until the history fits again. The
+    system and user prompts, every assistant message (with its tool_calls) and
+    every tool message's tool_call_id stay in place, so the request remains
+    valid; the last `keep_turns` tool turns are never touched.
+    """
+
+    def __init__(self, max_tokens: int = 10000, keep_turns: int = 1, gist_chars: int = 160):
+        self.max_tokens = max_tokens
+        self.keep_turns = keep_turns
+        self.gist_chars = gist_chars
+        self.saved_tokens = 0
+
+    def compact(self, messages: list) -> int:
+        """
+        Compacts `messages` in place if needed.
+
+        Returns:
+            int: Estimated tokens saved by this call.
+        """
+        total = messages_tokens(messages)
+        if total <= self.max_tokens:
+            return 0
+
+        turn_starts = [i for i, m in enumerate(messages) if _role(m) == "assistant"]
+        if len(turn_starts) <= self.keep_turns:
+            return 0
+        protected_from = turn_starts[-self.keep_turns] if self.keep_turns else len(messages)
+
+        saved = 0
+        for i in range(protected_from):
+            message = messages[i]
+            if total - saved <= self.max_tokens:
+                break
+            if not isinstance(message, dict) or message.get("role") != "tool":
+                continue
+            compacted = digest(message["content"], self.gist_chars)
+            saved += estimate_tokens(message["content"]) - estimate_tokens(compacted)
+            messages[i] = {**message, "content": compacted}
+
+        self.saved_tokens += saved
+        if saved:
+            tracing.annotate(compacted_tokens=self.saved_tokens)
+        return saved
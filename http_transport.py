@@ -0,0 +1,305 @@
+# ================================
+# Standard library imports
+# ================================
+import asyncio
+import random
+import threading
+import time
+from urllib.parse import urlsplit
+
+# ================================
+# Third-party imports
+# ================================
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+
+# ================================
+# Local / project imports
+# ================================
+from run_budget import CALL_DEADLINE
+
+# Responses worth retrying: throttled or temporarily unavailable
+RETRY_STATUSES = (429, 503)
+
+# Requests per second and burst size per host. arXiv asks for no more than one
+# request every three seconds; DuckDuckGo throttles aggressive clients too.
+DEFAULT_HOST_LIMITS = {
+    "export.arxiv.org": (1 / 3, 1),
+    "arxiv.org": (1.0, 4),
+    "duckduckgo.com": (1.0, 2),
+}
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket. reserve() takes a token immediately (possibly
+    going into debt) and returns how long the caller must wait before using it,
+    so the same bucket serves threads and coroutines alike.
+    """
+
+    def __init__(self, rate: float, capacity: float = 1):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+            self._last = now
+            self._tokens -= 1
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+    def refund(self):
+        """
+        Returns a reserved token that will not be used.
+        """
+        with self._lock:
+            self._tokens = min(self.capacity, self._tokens + 1)
+
+
+class HostRateLimiter:
+    """
+    One TokenBucket per host; hosts without a configured limit are not throttled.
+    """
+
+    def __init__(self, limits: dict | None = None):
+        limits = DEFAULT_HOST_LIMITS if limits is None else limits
+        self._buckets = {host: TokenBucket(rate, burst) for host, (rate, burst) in limits.items()}
+
+    def set_limit(self, host: str, rate: float, burst: float = 1):
+        self._buckets[host] = TokenBucket(rate, burst)
+
+    def _bucket(self, host: str | None):
+        if not host:
+            return None
+        # Match "api.duckduckgo.com" against a "duckduckgo.com" entry as well
+        for candidate, bucket in self._buckets.items():
+            if host == candidate or host.endswith("." + candidate):
+                return bucket
+        return None
+
+    def _reserve(self, host: str | None, deadline: float | None) -> float | None:
+        bucket = self._bucket(host)
+        if bucket is None:
+            return 0.0
+        delay = bucket.reserve()
+        if not _fits(delay, deadline):
+            bucket.refund()
+            return None
+        return delay
+
+    def wait(self, host: str | None, deadline: float | None = None) -> bool:
+        """
+        Waits for the host's next slot. Returns False, without waiting, if the
+        slot would only come after `deadline` (a time.monotonic() value).
+        """
+        delay = self._reserve(host, deadline)
+        if delay:
+            time.sleep(delay)
+        return delay is not None
+
+    async def async_wait(self, host: str | None, deadline: float | None = None) -> bool:
+        delay = self._reserve(host, deadline)
+        if delay:
+            await asyncio.sleep(delay)
+        return delay is not None
+
+
+# Process-wide limiter shared by the sync and async transports
+LIMITER = HostRateLimiter()
+
+
+class LoopLocal:
+    """
+    One object per running event loop, created by `factory` on first use.
+
+    httpx connection pools (and so AsyncRateLimitedClient and AsyncOpenAI)
+    belong to the event loop that opened them; a client reused from a loop
+    that asyncio.run() has already closed fails on its stale connections.
+    Entries of closed loops are dropped. Outside a running loop one shared
+    object is used.
+    """
+
+    def __init__(self, factory):
+        self.factory = factory
+        self._objects = {}
+        self._lock = threading.Lock()
+
+    def get(self):
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+        with self._lock:
+            for closed in [l for l in self._objects if l is not None and l.is_closed()]:
+                del self._objects[closed]
+            if loop not in self._objects:
+                self._objects[loop] = self.factory()
+            return self._objects[loop]
+
+
+def backoff_delay(attempt: int, base: float = 1.0, cap: float = 30.0) -> float:
+    """
+    Exponential backoff with full jitter.
+    """
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+def _retry_after(headers) -> float | None:
+    value = headers.get("Retry-After")
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+def _deadline(deadline: float | None) -> float | None:
+    """
+    The earlier of an explicit deadline and the current tool call's CALL_DEADLINE.
+    """
+    enclosing = CALL_DEADLINE.get()
+    if deadline is None or enclosing is None:
+        return enclosing if deadline is None else deadline
+    return min(deadline, enclosing)
+
+
+def _fits(delay: float, deadline: float | None) -> bool:
+    return deadline is None or time.monotonic() + delay < deadline
+
+
+def _capped_timeout(timeout, deadline: float | None):
+    """
+    A numeric (or missing) per-attempt timeout shortened to the time left
+    before `deadline`; structured timeouts are left alone.
+    """
+    if deadline is None or not isinstance(timeout, (int, float, type(None))):
+        return timeout
+    remaining = max(0.0, deadline - time.monotonic())
+    return remaining if timeout is None else min(timeout, remaining)
+
+
+class RateLimitedSession(requests.Session):
+    """
+    requests.Session with a sized connection pool, per-host rate limiting and
+    jittered retries on 429/503 and connection errors.
+
+    A request never outlives its deadline: the `deadline` argument (a
+    time.monotonic() value) or, inside a tool call, the executor's
+    CALL_DEADLINE. Each attempt's timeout is cut to the time left, and no
+    retry is started (or slept for) that could not finish before it.
+    """
+
+    def __init__(
+        self,
+        pool_connections: int = 10,
+        pool_maxsize: int = 20,
+        retries: int = 3,
+        backoff: float = 1.0,
+        limiter: HostRateLimiter = LIMITER,
+    ):
+        super().__init__()
+        self.retries = retries
+        self.backoff = backoff
+        self.limiter = limiter
+        adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize, pool_block=True)
+        self.mount("https://", adapter)
+        self.mount("http://", adapter)
+
+    def request(self, method, url, *args, deadline: float | None = None, **kwargs):
+        host = urlsplit(url).hostname
+        deadline = _deadline(deadline)
+        for attempt in range(self.retries + 1):
+            if not self.limiter.wait(host, deadline):
+                raise requests.exceptions.Timeout(f"Deadline reached before a request to {host} could start")
+            kwargs["timeout"] = _capped_timeout(kwargs.get("timeout"), deadline)
+            try:
+                response = super().request(method, url, *args, **kwargs)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+                delay = backoff_delay(attempt, self.backoff)
+                if attempt == self.retries or not _fits(delay, deadline):
+                    raise
+                time.sleep(delay)
+                continue
+
+            if response.status_code not in RETRY_STATUSES or attempt == self.retries:
+                return response
+            delay = _retry_after(response.headers) or backoff_delay(attempt, self.backoff)
+            if not _fits(delay, deadline):
+                return response
+            response.close()
+            time.sleep(delay)
+
+
+class AsyncRateLimitedClient(httpx.AsyncClient):
+    """
+    httpx.AsyncClient counterpart of RateLimitedSession, sharing its limiter
+    and its deadline handling.
+    """
+
+    def __init__(
+        self,
+        max_connections: int = 20,
+        max_keepalive_connections: int = 10,
+        retries: int = 3,
+        backoff: float = 1.0,
+        limiter: HostRateLimiter = LIMITER,
+        **kwargs,
+    ):
+        kwargs.setdefault(
+            "limits",
+            httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_keepalive_connections),
+        )
+        super().__init__(**kwargs)
+        self.retries = retries
+        self.backoff = backoff
+        self.limiter = limiter
+
+    async def request(self, method, url, *args, deadline: float | None = None, **kwargs):
+        host = httpx.URL(str(url)).host
+        deadline = _deadline(deadline)
+        for attempt in range(self.retries + 1):
+            if not await self.limiter.async_wait(host, deadline):
+                raise httpx.TimeoutException(f"Deadline reached before a request to {host} could start")
+            # Without an explicit timeout httpx uses the client's, which stays in force
+            if "timeout" in kwargs:
+                kwargs["timeout"] = _capped_timeout(kwargs["timeout"], deadline)
+            try:
+                response = await super().request(method, url, *args, **kwargs)
+            except (httpx.ConnectError, httpx.TimeoutException):
+                delay = backoff_delay(attempt, self.backoff)
+                if attempt == self.retries or not _fits(delay, deadline):
+                    raise
+                await asyncio.sleep(delay)
+                continue
+
+            if response.status_code not in RETRY_STATUSES or attempt == self.retries:
+                return response
+            delay = _retry_after(response.headers) or backoff_delay(attempt, self.backoff)
+            if not _fits(delay, deadline):
+                return response
+            await response.aclose()
+            await asyncio.sleep(delay)
+
+
+def call_with_retries(func, host: str, retry_on: tuple = (), retries: int = 3, backoff: float = 1.0, limiter: HostRateLimiter = LIMITER):
+    """
+    Runs a call made through a third-party client (e.g. DDGS) under the same
+    per-host limit, retrying with jittered backoff on the given exceptions.
+    The client's own timeout still applies, but no retry is started after the
+    current tool call's deadline.
+    """
+    deadline = _deadline(None)
+    for attempt in range(retries + 1):
+        if not limiter.wait(host, deadline):
+            raise TimeoutError(f"Deadline reached before a request to {host} could start")
+        try:
+            return func()
+        except retry_on:
+            delay = backoff_delay(attempt, backoff)
+            if attempt == retries or not _fits(delay, deadline):
+                raise
+            time.sleep(delay)
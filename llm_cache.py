@@ -0,0 +1,232 @@
+# ================================
+# Standard library imports
+# ================================
+import functools
+import hashlib
+import inspect
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+# ================================
+# Local / project imports
+# ================================
+import tracing
+
+# Request arguments that change the completion; anything else (timeouts,
+# extra headers, ...) is ignored when building the cache key.
+KEY_FIELDS = (
+    "model", "messages", "tools", "tool_choice", "temperature", "top_p",
+    "max_tokens", "response_format", "seed", "stop", "n",
+)
+
+
+def _to_jsonable(value):
+    # ChatCompletionMessage and friends are pydantic models
+    if hasattr(value, "model_dump"):
+        return _to_jsonable(value.model_dump(exclude_none=True))
+    if isinstance(value, dict):
+        return {k: _to_jsonable(v) for k, v in value.items() if v is not None}
+    if isinstance(value, (list, tuple)):
+        return [_to_jsonable(v) for v in value]
+    return value
+
+
+def request_key(**request) -> str:
+    """
+    Canonical SHA-256 of a chat.completions.create request.
+    """
+    payload = {field: _to_jsonable(request[field]) for field in KEY_FIELDS if field in request}
+    raw = json.dumps(payload, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class MemoryBackend:
+    """
+    In-process LRU store.
+    """
+
+    def __init__(self, max_entries: int = 1000):
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str):
+        with self._lock:
+            if key not in self._data:
+                return None
+            self._data.move_to_end(key)
+            return self._data[key]
+
+    def set(self, key: str, value: str):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, key: str):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class DiskBackend:
+    """
+    SQLite store that survives restarts; one connection per thread.
+    """
+
+    def __init__(self, path: str = "llm_cache.sqlite3"):
+        self.path = path
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS llm_cache (key TEXT PRIMARY KEY, value TEXT NOT NULL, created REAL NOT NULL)"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def get(self, key: str):
+        with self._connect() as conn:
+            row = conn.execute("SELECT value FROM llm_cache WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def set(self, key: str, value: str):
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, value, created) VALUES (?, ?, ?)",
+                (key, value, time.time()),
+            )
+
+    def delete(self, key: str):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+
+    def clear(self):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM llm_cache")
+
+
+class LLMCache:
+    """
+    Exact-match cache for chat completions.
+
+    Only deterministic requests (temperature 0 or unset) are cached unless
+    `cache_any_temperature` is set or the temperature is listed in
+    `cached_temperatures`. Streaming requests are never cached.
+    """
+
+    def __init__(self, backend=None, cache_any_temperature: bool = False, cached_temperatures=()):
+        self.backend = backend or MemoryBackend()
+        self.cache_any_temperature = cache_any_temperature
+        self.cached_temperatures = set(cached_temperatures)
+        self.hits = 0
+        self.misses = 0
+
+    def is_cacheable(self, **request) -> bool:
+        if request.get("stream"):
+            return False
+        temperature = request.get("temperature")
+        return (
+            self.cache_any_temperature
+            or not temperature
+            or temperature in self.cached_temperatures
+        )
+
+    def get(self, **request):
+        from openai.types.chat import ChatCompletion
+
+        value = self.backend.get(request_key(**request))
+        tracing.annotate(cache_hit=value is not None)
+        if value is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return ChatCompletion.model_validate_json(value)
+
+    def set(self, response, **request):
+        self.backend.set(request_key(**request), response.model_dump_json())
+
+    def invalidate(self, **request):
+        """
+        Drops the cached response for one request (same arguments as create()).
+        """
+        self.backend.delete(request_key(**request))
+
+    def clear(self):
+        self.backend.clear()
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses}
+
+
+def install(client, cache: LLMCache) -> LLMCache:
+    """
+    Routes client.chat.completions.create through `cache` in place, so existing
+    call sites keep working unchanged. Works for OpenAI and AsyncOpenAI clients.
+    """
+    completions = client.chat.completions
+    create = completions.create
+
+    if inspect.iscoroutinefunction(create):
+
+        @functools.wraps(create)
+        async def cached_create(**request):
+            if not cache.is_cacheable(**request):
+                return await create(**request)
+            response = cache.get(**request)
+            if response is None:
+                response = await create(**request)
+                cache.set(response, **request)
+            return response
+
+    else:
+
+        @functools.wraps(create)
+        def cached_create(**request):
+            if not cache.is_cacheable(**request):
+                return create(**request)
+            response = cache.get(**request)
+            if response is None:
+                response = create(**request)
+                cache.set(response, **request)
+            return response
+
+    completions.create = cached_create
+    return cache
+
+
+def uninstall(client):
+    """
+    Restores the original create() after install().
+    """
+    completions = client.chat.completions
+    if "create" in vars(completions):
+        del completions.create
+
+
+def install_from_env(client) -> LLMCache | None:
+    """
+    Installs a cache when LLM_CACHE is set: "memory" for an in-process LRU, any
+    other value is used as the SQLite file path. LLM_CACHE_ANY_TEMPERATURE=1
+    also caches non-zero temperature requests.
+    """
+    target = os.getenv("LLM_CACHE")
+    if not target:
+        return None
+    backend = MemoryBackend() if target == "memory" else DiskBackend(target)
+    any_temperature = os.getenv("LLM_CACHE_ANY_TEMPERATURE") == "1"
+    return install(client, LLMCache(backend, cache_any_temperature=any_temperature))
@@ -0,0 +1,245 @@
+# ================================
+# Standard library imports
+# ================================
+import asyncio
+import contextvars
+import functools
+import heapq
+import inspect
+import itertools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# ================================
+# Local / project imports
+# ================================
+import tracing
+from tool_projection import estimate_tokens
+
+# Completion size assumed when a request does not set max_tokens
+DEFAULT_COMPLETION_TOKENS = 1024
+
+# Lower value = served first
+PRIORITY_SYNTHESIS = 0
+PRIORITY_TOOL_PLANNING = 10
+
+_priority_override = contextvars.ContextVar("llm_priority", default=None)
+
+
+@contextmanager
+def priority(value: int):
+    """
+    Forces the priority of LLM requests made inside the block.
+    """
+    token = _priority_override.set(value)
+    try:
+        yield
+    finally:
+        _priority_override.reset(token)
+
+
+def estimate_request_tokens(**request) -> int:
+    """
+    Prompt estimate (messages + tool schemas) plus the expected completion size.
+    """
+    messages = [
+        m.model_dump(exclude_none=True) if hasattr(m, "model_dump") else m
+        for m in request.get("messages", [])
+    ]
+    prompt = estimate_tokens(json.dumps(messages, default=str))
+    if request.get("tools"):
+        prompt += estimate_tokens(request["tools"])
+    return prompt + (request.get("max_tokens") or DEFAULT_COMPLETION_TOKENS)
+
+
+def request_priority(**request) -> int:
+    """
+    Requests without tools (final synthesis, reflection, HTML) or with tools
+    disabled go first; tool-planning turns follow, later turns ahead of earlier
+    ones because they are closer to finishing a report.
+    """
+    override = _priority_override.get()
+    if override is not None:
+        return override
+    if not request.get("tools") or request.get("tool_choice") == "none":
+        return PRIORITY_SYNTHESIS
+    turn = sum(
+        1 for m in request.get("messages", [])
+        if (m.get("role") if isinstance(m, dict) else getattr(m, "role", None)) == "assistant"
+    )
+    return max(PRIORITY_SYNTHESIS + 1, PRIORITY_TOOL_PLANNING - turn)
+
+
+class LLMScheduler:
+    """
+    Central admission control for chat completions.
+
+    Requests-per-minute and tokens-per-minute budgets are enforced with two
+    token buckets refilled continuously. Waiting requests are served strictly
+    in priority order (then FIFO), so a backlog of tool-planning turns cannot
+    starve final-synthesis calls. Works for threads and asyncio tasks alike.
+    """
+
+    def __init__(self, rpm: float = 60, tpm: float = 1_000_000, poll: float = 0.05):
+        self.rpm = rpm
+        self.tpm = tpm
+        self.poll = poll
+        self._requests = float(rpm)
+        self._tokens = float(tpm)
+        self._last = time.monotonic()
+        self._queue = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+
+    def _refill(self):
+        now = time.monotonic()
+        elapsed = now - self._last
+        self._last = now
+        self._requests = min(self.rpm, self._requests + elapsed * self.rpm / 60)
+        self._tokens = min(self.tpm, self._tokens + elapsed * self.tpm / 60)
+
+    def _try_admit(self, entry) -> float:
+        """
+        Admits `entry` if it is at the head of the queue and the budget allows;
+        returns 0 when admitted, otherwise the suggested wait in seconds.
+        """
+        self._refill()
+        tokens = entry[2]
+        if self._queue[0] is entry and self._requests >= 1 and self._tokens >= tokens:
+            heapq.heappop(self._queue)
+            self._requests -= 1
+            self._tokens -= tokens
+            self._publish_depth()
+            self._cond.notify_all()
+            return 0.0
+        if self._queue[0] is not entry:
+            return self.poll
+        missing_requests = max(0.0, 1 - self._requests) * 60 / self.rpm
+        missing_tokens = max(0.0, tokens - self._tokens) * 60 / self.tpm
+        return max(missing_requests, missing_tokens, 0.001)
+
+    def _enqueue(self, tokens: int, prio: int):
+        # A single request larger than the whole budget would never fit; cap it.
+        entry = (prio, next(self._seq), min(tokens, self.tpm))
+        heapq.heappush(self._queue, entry)
+        self._publish_depth()
+        return entry
+
+    def _abandon(self, entry):
+        """
+        Removes a waiter that gave up (cancelled or failed) before being
+        admitted, so it cannot block the head of the queue.
+        """
+        if entry in self._queue:
+            self._queue.remove(entry)
+            heapq.heapify(self._queue)
+            self._publish_depth()
+            self._cond.notify_all()
+
+    def _publish_depth(self):
+        tracing.METRICS.set("research_agent_llm_queue_depth", len(self._queue))
+
+    def acquire(self, tokens: int, prio: int = PRIORITY_TOOL_PLANNING):
+        started = time.monotonic()
+        with self._cond:
+            entry = self._enqueue(tokens, prio)
+            try:
+                while True:
+                    wait = self._try_admit(entry)
+                    if not wait:
+                        break
+                    self._cond.wait(timeout=wait)
+            except BaseException:
+                self._abandon(entry)
+                raise
+        tracing.METRICS.observe("research_agent_llm_queue_wait_seconds", time.monotonic() - started, priority=prio)
+
+    async def async_acquire(self, tokens: int, prio: int = PRIORITY_TOOL_PLANNING):
+        started = time.monotonic()
+        with self._cond:
+            entry = self._enqueue(tokens, prio)
+        try:
+            while True:
+                with self._cond:
+                    wait = self._try_admit(entry)
+                if not wait:
+                    break
+                await asyncio.sleep(min(wait, self.poll))
+        except BaseException:
+            with self._cond:
+                self._abandon(entry)
+            raise
+        tracing.METRICS.observe("research_agent_llm_queue_wait_seconds", time.monotonic() - started, priority=prio)
+
+    def settle(self, estimated: int, actual: int):
+        """
+        Corrects the token budget once the real usage of a request is known.
+        """
+        with self._cond:
+            self._tokens = min(self.tpm, self._tokens + estimated - actual)
+            self._cond.notify_all()
+
+    def queue_depth(self) -> int:
+        with self._cond:
+            return len(self._queue)
+
+
+def _actual_tokens(response) -> int | None:
+    usage = getattr(response, "usage", None)
+    return getattr(usage, "total_tokens", None) if usage is not None else None
+
+
+def install(client, scheduler: LLMScheduler) -> LLMScheduler:
+    """
+    Puts `scheduler` in front of client.chat.completions.create (sync or async).
+    Install it before any response cache so cache hits do not use up quota.
+    """
+    completions = client.chat.completions
+    create = completions.create
+
+    if inspect.iscoroutinefunction(create):
+
+        @functools.wraps(create)
+        async def scheduled_create(**request):
+            tokens = estimate_request_tokens(**request)
+            await scheduler.async_acquire(tokens, request_priority(**request))
+            response = await create(**request)
+            actual = _actual_tokens(response)
+            if actual is not None:
+                scheduler.settle(tokens, actual)
+            return response
+
+    else:
+
+        @functools.wraps(create)
+        def scheduled_create(**request):
+            tokens = estimate_request_tokens(**request)
+            scheduler.acquire(tokens, request_priority(**request))
+            response = create(**request)
+            actual = _actual_tokens(response)
+            if actual is not None:
+                scheduler.settle(tokens, actual)
+            return response
+
+    completions.create = scheduled_create
+    return scheduler
+
+
+# Process-wide scheduler shared by every client configured from the environment
+_env_scheduler = None
+
+
+def install_from_env(client) -> LLMScheduler | None:
+    """
+    Installs the shared scheduler when LLM_RPM and/or LLM_TPM are set.
+    """
+    global _env_scheduler
+    rpm, tpm = os.getenv("LLM_RPM"), os.getenv("LLM_TPM")
+    if not rpm and not tpm:
+        return None
+    if _env_scheduler is None:
+        _env_scheduler = LLMScheduler(rpm=float(rpm or 1_000_000), tpm=float(tpm or 1_000_000_000))
+    return install(client, _env_scheduler)
@@ -0,0 +1,101 @@
+# ================================
+# Standard library imports
+# ================================
+import json
+import os
+
+# ================================
+# Local / project imports
+# ================================
+import tracing
+
+DEFAULT_MODEL = "gemini-2.0-flash-exp"
+
+# plan: tool-planning turns of the research loop; synthesis: the turn that
+# writes the report; reflection: reflection_and_rewrite / reflect_and_render;
+# html: convert_report_to_html.
+STAGES = ("plan", "synthesis", "reflection", "html")
+
+
+def malformed_tool_calls(tool_calls, tool_names) -> bool:
+    """
+    True if any call names an unknown tool or has arguments that are not a JSON object.
+    """
+    for call in tool_calls:
+        if call.function.name not in tool_names:
+            return True
+        try:
+            args = json.loads(call.function.arguments or "{}")
+        except (TypeError, ValueError):
+            return True
+        if not isinstance(args, dict):
+            return True
+    return False
+
+
+class ModelRouter:
+    """
+    Chooses the model for each pipeline stage.
+
+    Stages without an explicit model use `default`, so a router with no
+    overrides behaves like the single-model pipeline. A typical setup sends
+    planning and HTML to a fast model and synthesis and reflection to a
+    stronger one:
+
+        ModelRouter(plan="gemini-2.0-flash-lite", html="gemini-2.0-flash-lite",
+                    synthesis="gemini-2.5-pro", reflection="gemini-2.5-pro")
+    """
+
+    def __init__(self, default: str = DEFAULT_MODEL, **stage_models):
+        unknown = set(stage_models) - set(STAGES)
+        if unknown:
+            raise ValueError(f"Unknown pipeline stages: {sorted(unknown)}")
+        self.default = default
+        self.models = {stage: stage_models.get(stage) or default for stage in STAGES}
+
+    @classmethod
+    def from_env(cls, default: str | None = None) -> "ModelRouter":
+        """
+        Router from MODEL_DEFAULT and MODEL_PLAN / MODEL_SYNTHESIS /
+        MODEL_REFLECTION / MODEL_HTML.
+        """
+        return cls(
+            default or os.getenv("MODEL_DEFAULT", DEFAULT_MODEL),
+            **{stage: os.getenv(f"MODEL_{stage.upper()}") for stage in STAGES},
+        )
+
+    def model(self, stage: str) -> str:
+        return self.models[stage]
+
+    def resolve(self, model: str | None, stage: str) -> str:
+        """
+        An explicitly requested model wins; otherwise the stage's model.
+        """
+        return model or self.models[stage]
+
+    def turn_model(self, final_turn: bool) -> str:
+        return self.models["synthesis" if final_turn else "plan"]
+
+    def escalation(self, msg, model: str, tool_names) -> tuple[str, str] | None:
+        """
+        (model, tool_choice) to redo a research turn with, or None if `msg` can be used.
+
+        A turn answered by the planning model is redone with the synthesis
+        model when it has malformed tool calls (tool_choice "auto"), or when it
+        has no tool calls at all, because the report itself should come from the
+        stronger model. That redo is the final answer, so it gets tool_choice
+        "none": letting it call tools would hand the next turn back to the
+        planning model, which could draft (and waste) another answer.
+        """
+        strong = self.models["synthesis"]
+        if model == strong:
+            return None
+        if not msg.tool_calls:
+            reason = "synthesis"
+        elif malformed_tool_calls(msg.tool_calls, tool_names):
+            reason = "malformed_tool_calls"
+        else:
+            return None
+        tracing.METRICS.inc("research_agent_model_escalations_total", reason=reason)
+        tracing.annotate(escalated=reason)
+        return strong, "none" if reason == "synthesis" else "auto"
@@ -0,0 +1,178 @@
+# ================================
+# Standard library imports
+# ================================
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+
+# ================================
+# Local / project imports
+# ================================
+from records import PaperBatch
+
+DEFAULT_INDEX_PATH = "paper_index.sqlite3"
+
+# bm25() column weights: title, authors, summary
+BM25_WEIGHTS = (10.0, 3.0, 1.0)
+
+
+def fts_query(text: str) -> str:
+    """
+    Turns free text into an FTS5 query: every word is quoted (so punctuation and
+    FTS operators in user input are harmless) and terms are OR-ed, letting BM25
+    rank papers that match more of them higher.
+    """
+    terms = re.findall(r"\w+", text.lower())
+    return " OR ".join(f'"{term}"' for term in terms)
+
+
+class PaperIndex:
+    """
+    Local SQLite FTS5 index over arXiv records.
+
+    Records are upserted by URL into a plain table; an external-content FTS5
+    table kept in sync by triggers indexes title, authors and summary. Queries
+    are ranked with BM25. One connection per thread (and process) as in
+    tool_cache.ToolCache.
+    """
+
+    def __init__(self, path: str = DEFAULT_INDEX_PATH):
+        self.path = path
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS papers (
+                    id INTEGER PRIMARY KEY,
+                    url TEXT UNIQUE NOT NULL,
+                    title TEXT NOT NULL,
+                    authors TEXT NOT NULL,
+                    published TEXT,
+                    summary TEXT,
+                    link_pdf TEXT,
+                    added REAL NOT NULL
+                );
+                CREATE VIRTUAL TABLE IF NOT EXISTS papers_fts USING fts5(
+                    title, authors, summary, content='papers', content_rowid='id'
+                );
+                CREATE TRIGGER IF NOT EXISTS papers_ai AFTER INSERT ON papers BEGIN
+                    INSERT INTO papers_fts(rowid, title, authors, summary)
+                    VALUES (new.id, new.title, new.authors, new.summary);
+                END;
+                CREATE TRIGGER IF NOT EXISTS papers_ad AFTER DELETE ON papers BEGIN
+                    INSERT INTO papers_fts(papers_fts, rowid, title, authors, summary)
+                    VALUES ('delete', old.id, old.title, old.authors, old.summary);
+                END;
+                CREATE TRIGGER IF NOT EXISTS papers_au AFTER UPDATE ON papers BEGIN
+                    INSERT INTO papers_fts(papers_fts, rowid, title, authors, summary)
+                    VALUES ('delete', old.id, old.title, old.authors, old.summary);
+                    INSERT INTO papers_fts(rowid, title, authors, summary)
+                    VALUES (new.id, new.title, new.authors, new.summary);
+                END;
+                """
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def add(self, records) -> int:
+        """
+        Upserts paper dicts (arxiv_search_tool shape). Error records are skipped.
+
+        Returns:
+            int: Number of records written.
+        """
+        rows = [
+            (
+                r["url"],
+                r.get("title", ""),
+                json.dumps(r.get("authors", [])),
+                r.get("published"),
+                r.get("summary", ""),
+                r.get("link_pdf"),
+                time.time(),
+            )
+            for r in records
+            if isinstance(r, dict) and "error" not in r and r.get("url")
+        ]
+        if not rows:
+            return 0
+        with self._connect() as conn:
+            conn.executemany(
+                """
+                INSERT INTO papers (url, title, authors, published, summary, link_pdf, added)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(url) DO UPDATE SET
+                    title = excluded.title, authors = excluded.authors, published = excluded.published,
+                    summary = excluded.summary, link_pdf = excluded.link_pdf
+                """,
+                rows,
+            )
+        return len(rows)
+
+    def harvest(self, records, batch_size: int = 500) -> int:
+        """
+        Indexes a (possibly very long) stream of paper dicts or PaperRecords,
+        e.g. from research_tools.iter_arxiv_results(..., as_records=True),
+        committing every `batch_size` papers. Pending papers are buffered in a
+        columnar PaperBatch rather than a list of dicts.
+
+        Returns:
+            int: Number of records written.
+        """
+        written = 0
+        batch = PaperBatch()
+        for record in records:
+            if isinstance(record, dict) and ("error" in record or not record.get("url")):
+                continue
+            batch.append(record)
+            if len(batch) >= batch_size:
+                written += self.add(batch)
+                batch = PaperBatch()
+        return written + self.add(batch)
+
+    def search(self, query: str, max_results: int = 5) -> list[dict]:
+        """
+        BM25-ranked full-text search over indexed papers.
+
+        Returns:
+            list[dict]: Papers in the arxiv_search_tool shape, best match first.
+        """
+        match = fts_query(query)
+        if not match:
+            return []
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"""
+                SELECT p.title, p.authors, p.published, p.url, p.summary, p.link_pdf
+                FROM papers_fts JOIN papers p ON p.id = papers_fts.rowid
+                WHERE papers_fts MATCH ?
+                ORDER BY bm25(papers_fts, {", ".join(map(str, BM25_WEIGHTS))})
+                LIMIT ?
+                """,
+                (match, max_results),
+            ).fetchall()
+        return [
+            {
+                "title": title,
+                "authors": json.loads(authors),
+                "published": published,
+                "url": url,
+                "summary": summary,
+                "link_pdf": link_pdf,
+            }
+            for title, authors, published, url, summary, link_pdf in rows
+        ]
+
+    def __len__(self) -> int:
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM papers").fetchone()[0]
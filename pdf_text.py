@@ -0,0 +1,262 @@
+# ================================
+# Standard library imports
+# ================================
+import contextvars
+import hashlib
+import json
+import mmap
+import multiprocessing
+import os
+import re
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+# ================================
+# Local / project imports
+# ================================
+from run_budget import CALL_DEADLINE
+
+DEFAULT_PDF_DIR = "pdf_cache"
+
+# Paragraph-sized pieces that sections are selected from
+CHUNK_CHARS = 1200
+
+# Extraction workers are started fresh rather than forked from a process
+# that already runs several thread pools
+_MP_CONTEXT = multiprocessing.get_context(
+    "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+)
+
+
+def extract_pages(path: str) -> list[str]:
+    """
+    Extracts the text of every page of a cached PDF.
+
+    Runs in a worker process. The file is memory-mapped rather than read, so
+    large PDFs are paged in on demand instead of being copied into the heap.
+    Needs the optional `pypdf` package.
+    """
+    from pypdf import PdfReader
+
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        reader = PdfReader(mm)
+        return [page.extract_text() or "" for page in reader.pages]
+
+
+def _split(text: str, max_chars: int = CHUNK_CHARS) -> list[str]:
+    """
+    Breaks `text` into pieces of at most `max_chars`, at sentence boundaries
+    where possible and at word boundaries otherwise.
+    """
+    pieces = []
+    for sentence in re.split(r"(?<=[.!?])\s+", text):
+        while len(sentence) > max_chars:
+            cut = sentence.rfind(" ", 0, max_chars + 1)
+            cut = cut if cut > 0 else max_chars
+            pieces.append(sentence[:cut])
+            sentence = sentence[cut:].lstrip()
+        if sentence:
+            pieces.append(sentence)
+    return pieces
+
+
+def _chunks(pages: list[str]):
+    """
+    Yields (page_number, text) pieces of at most CHUNK_CHARS characters.
+
+    Pieces are built from whole paragraphs when they fit. pypdf often
+    separates lines with single newlines only, so a page can be one long
+    "paragraph"; those are broken at line and then sentence boundaries.
+    """
+    for number, page in enumerate(pages, start=1):
+        text = ""
+        for paragraph in re.split(r"\n\s*\n", page):
+            units = [" ".join(paragraph.split())]
+            if len(units[0]) > CHUNK_CHARS:
+                units = [
+                    piece
+                    for line in paragraph.splitlines()
+                    for piece in _split(" ".join(line.split()))
+                ]
+            for unit in units:
+                if not unit:
+                    continue
+                if text and len(text) + 1 + len(unit) > CHUNK_CHARS:
+                    yield number, text
+                    text = ""
+                text = f"{text} {unit}".strip()
+        if text:
+            yield number, text
+
+
+def _remaining() -> float | None:
+    """
+    Seconds left before the current tool call's deadline (None without one).
+    """
+    deadline = CALL_DEADLINE.get()
+    return None if deadline is None else max(0.0, deadline - time.monotonic())
+
+
+def _trim(text: str, max_chars: int) -> str:
+    if len(text) <= max_chars:
+        return text
+    return text[:max_chars].rsplit(" ", 1)[0]
+
+
+def select_sections(pages: list[str], query: str, max_chars: int) -> tuple[str, bool]:
+    """
+    Picks the chunks that best match `query` (by term overlap), up to
+    `max_chars`, and returns them in document order with page markers. The
+    first chunk (title and abstract) is always kept, cut to `max_chars` if
+    it is larger on its own.
+
+    Returns:
+        (text, truncated)
+    """
+    chunks = list(_chunks(pages))
+    if not chunks:
+        return "", False
+
+    terms = set(re.findall(r"\w{3,}", query.lower()))
+
+    def score(chunk):
+        words = re.findall(r"\w{3,}", chunk[1].lower())
+        return sum(word in terms for word in words) / (len(words) ** 0.5 or 1)
+
+    first = _trim(chunks[0][1], max_chars)
+    chosen = {0: first}
+    used = len(first)
+    for i in sorted(range(1, len(chunks)), key=lambda i: score(chunks[i]), reverse=True):
+        size = len(chunks[i][1])
+        if used + size > max_chars:
+            continue
+        chosen[i] = chunks[i][1]
+        used += size
+
+    text = "\n\n".join(f"[p. {chunks[i][0]}] {chosen[i]}" for i in sorted(chosen))
+    return text, len(chosen) < len(chunks) or first != chunks[0][1]
+
+
+class PdfStore:
+    """
+    Content-addressed on-disk cache of downloaded PDFs and their extracted text.
+
+    Downloads are streamed to a temporary file while being hashed and then
+    renamed to `<sha256>.pdf`, so identical files are stored once and a crash
+    never leaves a partial PDF behind. A small pointer file maps each URL to
+    its content hash. Downloads run on a thread pool; text extraction runs on a
+    process pool and its result is cached next to the PDF as `<sha256>.json`.
+    Inside a tool call both respect the call's CALL_DEADLINE.
+    """
+
+    def __init__(self, directory: str = DEFAULT_PDF_DIR, max_downloads: int = 4, max_processes: int | None = None):
+        self.directory = directory
+        os.makedirs(os.path.join(directory, "urls"), exist_ok=True)
+        self.max_downloads = max_downloads
+        self.max_processes = max_processes
+        self._lock = threading.Lock()
+        self._threads = None
+        self._processes = None
+
+    def _pointer(self, url: str) -> str:
+        return os.path.join(self.directory, "urls", hashlib.sha256(url.encode()).hexdigest())
+
+    def _path(self, digest: str, ext: str) -> str:
+        return os.path.join(self.directory, f"{digest}.{ext}")
+
+    def cached_digest(self, url: str) -> str | None:
+        try:
+            with open(self._pointer(url)) as f:
+                digest = f.read().strip()
+        except FileNotFoundError:
+            return None
+        return digest if os.path.exists(self._path(digest, "pdf")) else None
+
+    def download(self, url: str, session, timeout: float = 60) -> str:
+        """
+        Streams `url` into the cache (unless already there) and returns its content hash.
+        """
+        digest = self.cached_digest(url)
+        if digest is not None:
+            return digest
+
+        sha = hashlib.sha256()
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".part")
+        try:
+            with os.fdopen(fd, "wb") as f, session.get(url, timeout=timeout, stream=True) as response:
+                response.raise_for_status()
+                for block in response.iter_content(chunk_size=1 << 16):
+                    sha.update(block)
+                    f.write(block)
+            digest = sha.hexdigest()
+            os.replace(tmp, self._path(digest, "pdf"))
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+        pointer_tmp = self._pointer(url) + ".part"
+        with open(pointer_tmp, "w") as f:
+            f.write(digest)
+        os.replace(pointer_tmp, self._pointer(url))
+        return digest
+
+    def _pools(self):
+        with self._lock:
+            if self._threads is None:
+                self._threads = ThreadPoolExecutor(max_workers=self.max_downloads, thread_name_prefix="pdf")
+                self._processes = ProcessPoolExecutor(max_workers=self.max_processes, mp_context=_MP_CONTEXT)
+        return self._threads, self._processes
+
+    def _pages(self, digest: str, processes) -> list[str]:
+        text_path = self._path(digest, "json")
+        if os.path.exists(text_path):
+            with open(text_path) as f:
+                return json.load(f)
+
+        future = processes.submit(extract_pages, self._path(digest, "pdf"))
+        try:
+            pages = future.result(timeout=_remaining())
+        except TimeoutError:
+            future.cancel()
+            raise TimeoutError("PDF text extraction did not finish before the deadline") from None
+        tmp = text_path + ".part"
+        with open(tmp, "w") as f:
+            json.dump(pages, f)
+        os.replace(tmp, text_path)
+        return pages
+
+    def fetch_pages(self, urls: list[str], session, timeout: float = 60) -> list:
+        """
+        Downloads and extracts several PDFs concurrently.
+
+        Returns:
+            list: One entry per URL, in order: the list of page texts, or the
+            exception that stopped that PDF.
+        """
+        threads, processes = self._pools()
+
+        def fetch(url):
+            return self._pages(self.download(url, session, timeout), processes)
+
+        # Each download runs in a copy of the caller's context, so the
+        # session's retries see the tool call's CALL_DEADLINE
+        futures = [threads.submit(contextvars.copy_context().run, fetch, url) for url in urls]
+        results = []
+        for url, future in zip(urls, futures):
+            try:
+                results.append(future.result(timeout=_remaining()))
+            except TimeoutError:
+                future.cancel()
+                results.append(TimeoutError(f"{url} was not ready before the deadline"))
+            except Exception as e:
+                results.append(e)
+        return results
+
+    def shutdown(self):
+        with self._lock:
+            if self._threads is not None:
+                self._threads.shutdown(wait=False, cancel_futures=True)
+                self._processes.shutdown(wait=False, cancel_futures=True)
+                self._threads = self._processes = None
@@ -0,0 +1,112 @@
+# ================================
+# Standard library imports
+# ================================
+import json
+
+# ================================
+# Local / project imports
+# ================================
+import research_tools
+import tracing
+from tool_cache import normalize_query
+
+PLANNER_SYSTEM_PROMPT = "You are a research librarian who plans literature searches."
+
+PLANNER_USER_PROMPT = """
+    Break the following research request into at most {max_queries} short, focused search queries
+    that together cover it (key concepts, methods, recent results). Each query is sent to both
+    arXiv and a web search engine, so use plain keywords, not questions.
+    Return ONLY valid JSON with the following structure:
+    {{
+        "queries": ["first query", "second query"]
+    }}
+
+    Research request:
+    {prompt}
+    """
+
+# Tools every planned query is sent to
+FAN_OUT_TOOLS = ("arxiv_search_tool", "web_search_tool")
+
+
+def _planner_request(prompt: str, model: str, max_queries: int) -> dict:
+    return {
+        "model": model,
+        "messages": [
+            {"role": "system", "content": PLANNER_SYSTEM_PROMPT},
+            {"role": "user", "content": PLANNER_USER_PROMPT.format(prompt=prompt, max_queries=max_queries)},
+        ],
+        "temperature": 0,
+    }
+
+
+def _parse_queries(response, max_queries: int) -> list[str]:
+    try:
+        data = research_tools.parse_json_output(response.choices[0].message.content or "")
+    except Exception:
+        # Planning is optional: an unusable reply just means no seeded searches
+        return []
+    queries = data.get("queries") if isinstance(data, dict) else None
+    if not isinstance(queries, list):
+        return []
+    unique = {}
+    for query in queries:
+        if isinstance(query, str) and query.strip():
+            unique.setdefault(normalize_query(query), query.strip())
+    return list(unique.values())[:max_queries]
+
+
+@tracing.traced("plan")
+def plan_queries(client, prompt: str, model: str, max_queries: int = 4) -> tuple[list[str], object]:
+    """
+    Asks the model, in a single call, for up to `max_queries` search queries
+    covering `prompt`.
+
+    Returns:
+        (queries, response): queries is empty if the reply is not usable; the
+        raw response is returned so its usage can be charged to a RunBudget.
+    """
+    response = client.chat.completions.create(**_planner_request(prompt, model, max_queries))
+    return _parse_queries(response, max_queries), response
+
+
+@tracing.traced("plan")
+async def async_plan_queries(client, prompt: str, model: str, max_queries: int = 4) -> tuple[list[str], object]:
+    """
+    Async version of plan_queries for AsyncOpenAI clients.
+    """
+    response = await client.chat.completions.create(**_planner_request(prompt, model, max_queries))
+    return _parse_queries(response, max_queries), response
+
+
+def fan_out_calls(queries: list[str], tools=FAN_OUT_TOOLS, max_results: int = 5) -> tuple[list, list]:
+    """
+    One (tool_name, args) call per query and tool, with synthetic tool_call ids.
+
+    Returns:
+        (calls, call_ids)
+    """
+    calls = [(tool, {"query": query, "max_results": max_results}) for query in queries for tool in tools]
+    call_ids = [f"plan_{i}" for i in range(len(calls))]
+    return calls, call_ids
+
+
+def seed_messages(calls: list, call_ids: list[str], results: list) -> list[dict]:
+    """
+    Messages that present the fanned-out searches as an assistant tool-calling
+    turn followed by its tool results, so the history keeps the same
+    tool_call_id pairing as turns produced by the model.
+    """
+    assistant = {
+        "role": "assistant",
+        "content": None,
+        "tool_calls": [
+            {"id": call_id, "type": "function", "function": {"name": tool_name, "arguments": json.dumps(args)}}
+            for call_id, (tool_name, args) in zip(call_ids, calls)
+        ],
+    }
+    tool_messages = [
+        {"role": "tool", "tool_call_id": call_id, "name": tool_name, "content": json.dumps(result)}
+        for call_id, (tool_name, _), result in zip(call_ids, calls, results)
+    ]
+    return [assistant] + tool_messages
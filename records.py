@@ -0,0 +1,189 @@
+# ================================
+# Standard library imports
+# ================================
+import sys
+from array import array
+
+
+class PaperRecord:
+    """
+    Compact arXiv paper record (same fields as an arxiv_search_tool dict).
+
+    Uses __slots__ instead of a per-instance dict and interns author names and
+    dates, which repeat heavily across large result sets.
+    """
+
+    __slots__ = ("title", "authors", "published", "url", "summary", "link_pdf")
+
+    def __init__(self, title: str, authors, published: str, url: str, summary: str, link_pdf: str | None = None):
+        self.title = title
+        self.authors = tuple(sys.intern(a) for a in authors)
+        self.published = sys.intern(published) if published else published
+        self.url = url
+        self.summary = summary
+        self.link_pdf = link_pdf
+
+    @classmethod
+    def from_dict(cls, d: dict) -> "PaperRecord":
+        return cls(d["title"], d.get("authors", ()), d.get("published"), d["url"], d.get("summary", ""), d.get("link_pdf"))
+
+    def to_dict(self) -> dict:
+        return {
+            "title": self.title,
+            "authors": list(self.authors),
+            "published": self.published,
+            "url": self.url,
+            "summary": self.summary,
+            "link_pdf": self.link_pdf,
+        }
+
+    def __repr__(self):
+        return f"PaperRecord(title={self.title!r}, url={self.url!r})"
+
+
+class SearchHit:
+    """
+    Compact web search hit (same fields as a web_search_tool dict).
+    """
+
+    __slots__ = ("title", "content", "url")
+
+    def __init__(self, title: str, content: str, url: str):
+        self.title = title
+        self.content = content
+        self.url = url
+
+    @classmethod
+    def from_dict(cls, d: dict) -> "SearchHit":
+        return cls(d.get("title", ""), d.get("content", ""), d.get("url", ""))
+
+    def to_dict(self) -> dict:
+        return {"title": self.title, "content": self.content, "url": self.url}
+
+    def __repr__(self):
+        return f"SearchHit(title={self.title!r}, url={self.url!r})"
+
+
+class PaperBatch:
+    """
+    Columnar container for many arXiv records.
+
+    Each field is stored as its own column. Authors are stored once in a shared
+    name table and referenced through compact integer arrays, so a batch of tens
+    of thousands of papers costs a fraction of the equivalent list of dicts.
+    Indexing and iteration give back the usual dict shape (a list of them for
+    slices).
+    """
+
+    def __init__(self, records=()):
+        self.titles = []
+        self.published = []
+        self.urls = []
+        self.summaries = []
+        self.link_pdfs = []
+        self.author_names = []
+        self._author_ids = {}
+        self.author_refs = array("I")
+        self.author_offsets = array("I", [0])
+        self.extend(records)
+
+    def _author_id(self, name: str) -> int:
+        author_id = self._author_ids.get(name)
+        if author_id is None:
+            author_id = len(self.author_names)
+            self.author_names.append(sys.intern(name))
+            self._author_ids[name] = author_id
+        return author_id
+
+    def append(self, record):
+        """
+        Adds a paper given as a dict or PaperRecord. Error records are skipped.
+        """
+        if isinstance(record, dict):
+            if "error" in record:
+                return
+            record = PaperRecord.from_dict(record)
+        self.titles.append(record.title)
+        self.published.append(record.published)
+        self.urls.append(record.url)
+        self.summaries.append(record.summary)
+        self.link_pdfs.append(record.link_pdf)
+        self.author_refs.extend(self._author_id(a) for a in record.authors)
+        self.author_offsets.append(len(self.author_refs))
+
+    def extend(self, records):
+        for record in records:
+            self.append(record)
+
+    def __len__(self) -> int:
+        return len(self.titles)
+
+    def authors(self, i: int) -> list[str]:
+        start, end = self.author_offsets[i], self.author_offsets[i + 1]
+        return [self.author_names[j] for j in self.author_refs[start:end]]
+
+    def record(self, i: int) -> PaperRecord:
+        return PaperRecord(self.titles[i], self.authors(i), self.published[i], self.urls[i], self.summaries[i], self.link_pdfs[i])
+
+    def __getitem__(self, i: int | slice) -> dict | list[dict]:
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("PaperBatch index out of range")
+        return {
+            "title": self.titles[i],
+            "authors": self.authors(i),
+            "published": self.published[i],
+            "url": self.urls[i],
+            "summary": self.summaries[i],
+            "link_pdf": self.link_pdfs[i],
+        }
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def to_dicts(self) -> list[dict]:
+        return list(self)
+
+
+class HitBatch:
+    """
+    Columnar container for many web search hits.
+    """
+
+    def __init__(self, hits=()):
+        self.titles = []
+        self.contents = []
+        self.urls = []
+        self.extend(hits)
+
+    def append(self, hit):
+        if isinstance(hit, dict):
+            if "error" in hit:
+                return
+            hit = SearchHit.from_dict(hit)
+        self.titles.append(hit.title)
+        self.contents.append(hit.content)
+        self.urls.append(hit.url)
+
+    def extend(self, hits):
+        for hit in hits:
+            self.append(hit)
+
+    def __len__(self) -> int:
+        return len(self.titles)
+
+    def __getitem__(self, i: int | slice) -> dict | list[dict]:
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        return {"title": self.titles[i], "content": self.contents[i], "url": self.urls[i]}
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def to_dicts(self) -> list[dict]:
+        return list(self)
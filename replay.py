@@ -0,0 +1,323 @@
+# ================================
+# Standard library imports
+# ================================
+import asyncio
+import base64
+import functools
+import hashlib
+import inspect
+import io
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# ================================
+# Local / project imports
+# ================================
+import research_tools
+from llm_cache import request_key
+
+MODES = ("record", "replay", "auto")
+
+_MISSING = object()
+
+
+class CassetteMiss(LookupError):
+    """
+    Raised in replay mode when a request was never recorded.
+    """
+
+
+class Cassette:
+    """
+    Record/replay store for the pipeline's external dependencies.
+
+    Interactions are kept in a JSONL file, one line per recorded call, keyed on
+    the dependency name ("http", "ddgs" or "llm") and a hash of the request.
+
+    Modes:
+        record: always call the real dependency and (re)record the answer.
+        replay: only serve recorded answers; unknown requests raise CassetteMiss.
+        auto:   replay when recorded, otherwise call through and record.
+
+    `latency` maps a dependency name to seconds of simulated delay added to
+    every replayed call, so timing experiments stay reproducible offline.
+    """
+
+    def __init__(self, path: str, mode: str = "auto", latency: dict | None = None):
+        if mode not in MODES:
+            raise ValueError(f"mode must be one of {MODES}, got {mode!r}")
+        self.path = path
+        self.mode = mode
+        self.latency = latency or {}
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._patches = []
+
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        entry = json.loads(line)
+                        self._entries[(entry["dependency"], entry["key"])] = entry["response"]
+
+    @staticmethod
+    def make_key(*parts) -> str:
+        raw = json.dumps(parts, sort_keys=True, default=str)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def lookup(self, dependency: str, key: str):
+        """
+        Returns the recorded response, or None when the real call should be made.
+        """
+        if self.mode == "record":
+            return None
+        with self._lock:
+            response = self._entries.get((dependency, key))
+        if response is None and self.mode == "replay":
+            raise CassetteMiss(f"no recorded {dependency} interaction for key {key[:12]}…")
+        return response
+
+    def record(self, dependency: str, key: str, response):
+        with self._lock:
+            self._entries[(dependency, key)] = response
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps({"dependency": dependency, "key": key, "response": response}) + "\n")
+
+    def delay(self, dependency: str):
+        seconds = self.latency.get(dependency, 0)
+        if seconds:
+            time.sleep(seconds)
+
+    async def async_delay(self, dependency: str):
+        seconds = self.latency.get(dependency, 0)
+        if seconds:
+            await asyncio.sleep(seconds)
+
+    def patch(self, obj, attr: str, value):
+        self._patches.append((obj, attr, obj.__dict__.get(attr, _MISSING)))
+        setattr(obj, attr, value)
+
+    def unpatch(self):
+        """
+        Undoes every patch applied through this cassette, newest first.
+        """
+        while self._patches:
+            obj, attr, original = self._patches.pop()
+            if original is _MISSING:
+                delattr(obj, attr)
+            else:
+                setattr(obj, attr, original)
+
+
+# ================================
+# HTTP (research_tools.session / get_async_session())
+# ================================
+
+def _encode_body(content: bytes) -> dict:
+    try:
+        return {"text": content.decode("utf-8")}
+    except UnicodeDecodeError:
+        return {"base64": base64.b64encode(content).decode("ascii")}
+
+
+def _decode_body(body: dict) -> bytes:
+    if "text" in body:
+        return body["text"].encode("utf-8")
+    return base64.b64decode(body["base64"])
+
+
+class ReplayResponse:
+    """
+    Minimal stand-in for requests/httpx responses as used by research_tools.
+    """
+
+    def __init__(self, url: str, status_code: int, content: bytes, error_cls=None):
+        self.url = url
+        self.error_cls = error_cls or research_tools.requests.exceptions.HTTPError
+        self.status_code = status_code
+        self.content = content
+        self.text = content.decode("utf-8", errors="replace")
+        self.raw = io.BytesIO(content)
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise self.error_cls(f"{self.status_code} error for url: {self.url}")
+
+    def json(self):
+        return json.loads(self.content)
+
+    def iter_content(self, chunk_size: int = 1):
+        for i in range(0, len(self.content), chunk_size):
+            yield self.content[i:i + chunk_size]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+def _patch_http(cassette: Cassette):
+    session = research_tools.session
+    real_get = session.get
+
+    @functools.wraps(real_get)
+    def get(url, **kwargs):
+        key = cassette.make_key("GET", url, kwargs.get("params"))
+        recorded = cassette.lookup("http", key)
+        if recorded is not None:
+            cassette.delay("http")
+            return ReplayResponse(url, recorded["status"], _decode_body(recorded["body"]))
+
+        response = real_get(url, **kwargs)
+        content = response.content
+        cassette.record("http", key, {"status": response.status_code, "body": _encode_body(content)})
+        return ReplayResponse(url, response.status_code, content)
+
+    cassette.patch(session, "get", get)
+
+    # Async clients are created per event loop, so patch their class
+    async_client_cls = research_tools.http_transport.AsyncRateLimitedClient
+    real_async_get = async_client_cls.get
+
+    @functools.wraps(real_async_get)
+    async def async_get(self, url, **kwargs):
+        key = cassette.make_key("GET", url, kwargs.get("params"))
+        recorded = cassette.lookup("http", key)
+        if recorded is not None:
+            await cassette.async_delay("http")
+            return ReplayResponse(url, recorded["status"], _decode_body(recorded["body"]), research_tools.httpx.HTTPError)
+
+        response = await real_async_get(self, url, **kwargs)
+        cassette.record("http", key, {"status": response.status_code, "body": _encode_body(response.content)})
+        return ReplayResponse(url, response.status_code, response.content, research_tools.httpx.HTTPError)
+
+    cassette.patch(async_client_cls, "get", async_get)
+
+
+# ================================
+# DuckDuckGo (research_tools.DDGS)
+# ================================
+
+def _patch_ddgs(cassette: Cassette):
+    real_ddgs = research_tools._ddgs()
+
+    class ReplayDDGS:
+        def __init__(self, *args, **kwargs):
+            self._args = args
+            self._kwargs = kwargs
+
+        def text(self, query, **kwargs):
+            key = cassette.make_key("text", query, kwargs)
+            recorded = cassette.lookup("ddgs", key)
+            if recorded is not None:
+                cassette.delay("ddgs")
+                return recorded
+            results = list(real_ddgs(*self._args, **self._kwargs).text(query, **kwargs) or [])
+            cassette.record("ddgs", key, results)
+            return results
+
+    cassette.patch(research_tools, "DDGS", ReplayDDGS)
+
+
+# ================================
+# LLM client (CLIENT / ASYNC_CLIENT)
+# ================================
+
+def patch_client(client, cassette: Cassette):
+    """
+    Records/replays client.chat.completions.create. Streaming requests are
+    passed straight through and never recorded.
+    """
+    from openai.types.chat import ChatCompletion
+
+    completions = client.chat.completions
+    create = completions.create
+
+    if inspect.iscoroutinefunction(create):
+
+        @functools.wraps(create)
+        async def replay_create(**request):
+            if request.get("stream"):
+                return await create(**request)
+            key = request_key(**request)
+            recorded = cassette.lookup("llm", key)
+            if recorded is not None:
+                await cassette.async_delay("llm")
+                return ChatCompletion.model_validate_json(recorded)
+            response = await create(**request)
+            cassette.record("llm", key, response.model_dump_json())
+            return response
+
+    else:
+
+        @functools.wraps(create)
+        def replay_create(**request):
+            if request.get("stream"):
+                return create(**request)
+            key = request_key(**request)
+            recorded = cassette.lookup("llm", key)
+            if recorded is not None:
+                cassette.delay("llm")
+                return ChatCompletion.model_validate_json(recorded)
+            response = create(**request)
+            cassette.record("llm", key, response.model_dump_json())
+            return response
+
+    cassette.patch(completions, "create", replay_create)
+
+
+def patch_research_tools(cassette: Cassette):
+    """
+    Records/replays research_tools' HTTP sessions and DuckDuckGo searches.
+    """
+    _patch_http(cassette)
+    _patch_ddgs(cassette)
+
+
+@contextmanager
+def use_cassette(path: str, mode: str = "auto", latency: dict | None = None, clients=()):
+    """
+    Patches research_tools and the given LLM clients for the duration of the block.
+
+    Example:
+        with replay.use_cassette("cassettes/novae.jsonl", mode="replay", clients=[CLIENT]):
+            unittests.test_generate_research_report_with_tools(generate_research_report_with_tools)
+    """
+    cassette = Cassette(path, mode=mode, latency=latency)
+    patch_research_tools(cassette)
+    for client in clients:
+        patch_client(client, cassette)
+    try:
+        yield cassette
+    finally:
+        cassette.unpatch()
+
+
+_env_cassette = None
+
+
+def install_from_env(client) -> Cassette | None:
+    """
+    Activates record/replay when REPLAY_CASSETTE is set.
+
+    REPLAY_MODE selects the mode (default "auto"); REPLAY_LATENCY optionally
+    holds a JSON object of simulated delays, e.g. '{"http": 0.4, "llm": 1.5}'.
+    """
+    global _env_cassette
+    path = os.getenv("REPLAY_CASSETTE")
+    if not path:
+        return None
+    # research_tools is shared by every client, so it is patched only once per process
+    if _env_cassette is None:
+        latency = json.loads(os.getenv("REPLAY_LATENCY", "{}"))
+        _env_cassette = Cassette(path, mode=os.getenv("REPLAY_MODE", "auto"), latency=latency)
+        patch_research_tools(_env_cassette)
+    patch_client(client, _env_cassette)
+    return _env_cassette
@@ -0,0 +1,166 @@
+# ================================
+# Standard library imports
+# ================================
+import html
+import re
+
+_HEADING = re.compile(r"^(#{1,6})\s+(.*?)\s*#*\s*$")
+_BULLET = re.compile(r"^\s*[-*+]\s+(.*)$")
+_NUMBERED = re.compile(r"^\s*\d+[.)]\s+(.*)$")
+_RULE = re.compile(r"^\s*([-*_])(\s*\1){2,}\s*$")
+_REFERENCE = re.compile(r"^\s*(?:[-*+]\s+|\d+[.)]\s+)?\[(\d+)\]")
+_LINK = re.compile(r"\[([^\]]+)\]\((https?://[^\s)\"]+)\)")
+_BARE_URL = re.compile(r"(?<![\"'=>])(https?://[^\s<>\"')\]]+[^\s<>\"')\].,;:])")
+_CITATION = re.compile(r"\[(\d+)\](?!\()")
+
+_STYLE = """
+    body { font-family: Georgia, 'Times New Roman', serif; max-width: 860px; margin: 2rem auto; padding: 0 1rem; line-height: 1.6; color: #222; }
+    h1, h2, h3, h4 { font-family: Helvetica, Arial, sans-serif; color: #1a3c6e; }
+    a { color: #1a5fb4; }
+    code, pre { background: #f4f4f4; border-radius: 4px; }
+    pre { padding: 0.75rem; overflow-x: auto; }
+    blockquote { border-left: 4px solid #ccc; margin-left: 0; padding-left: 1rem; color: #555; }
+"""
+
+
+def is_markdown_report(text: str) -> bool:
+    """
+    Heuristic: True if the report already uses Markdown structure (at least one
+    heading plus a few headings, list items or links), so it can be rendered
+    locally instead of asking the LLM to restructure it.
+    """
+    if re.search(r"<\s*(html|body|h1|p|div)\b", text, re.IGNORECASE):
+        return False
+    lines = text.splitlines()
+    headings = sum(1 for line in lines if _HEADING.match(line))
+    structural = headings + sum(
+        1 for line in lines if _BULLET.match(line) or _NUMBERED.match(line) or _LINK.search(line)
+    )
+    return headings >= 1 and structural >= 3
+
+
+def _href(url: str) -> str:
+    # The text is already escaped for element content; re-escape for an attribute value
+    return html.escape(html.unescape(url), quote=True)
+
+
+def _inline(text: str, references: set) -> str:
+    text = html.escape(text, quote=False)
+    links = []
+
+    def stash(anchor: str) -> str:
+        links.append(anchor)
+        return f"\x00{len(links) - 1}\x00"
+
+    # Links first, stashed so later substitutions cannot touch their URLs
+    text = _LINK.sub(
+        lambda m: stash(f'<a href="{_href(m.group(2))}">{m.group(1)}</a>'), text
+    )
+    text = _BARE_URL.sub(lambda m: stash(f'<a href="{_href(m.group(1))}">{m.group(1)}</a>'), text)
+    text = _CITATION.sub(
+        lambda m: f'<a href="#ref-{m.group(1)}">[{m.group(1)}]</a>' if m.group(1) in references else m.group(0),
+        text,
+    )
+    text = re.sub(r"`([^`]+)`", r"<code>\1</code>", text)
+    text = re.sub(r"\*\*(.+?)\*\*|__(.+?)__", lambda m: f"<strong>{m.group(1) or m.group(2)}</strong>", text)
+    text = re.sub(r"(?<![\w*])\*(?!\s)(.+?)(?<!\s)\*(?![\w*])", r"<em>\1</em>", text)
+    text = re.sub(r"(?<!\w)_(?!\s)(.+?)(?<!\s)_(?!\w)", r"<em>\1</em>", text)
+    return re.sub(r"\x00(\d+)\x00", lambda m: links[int(m.group(1))], text)
+
+
+def render_report_html(report: str, title: str | None = None) -> str:
+    """
+    Renders a Markdown-style research report (headings, lists, links, numbered
+    citations) into a complete HTML document without calling the LLM.
+
+    Numbered citations such as [3] link to the matching reference entry when the
+    report contains one.
+    """
+    lines = report.strip().splitlines()
+    references = {m.group(1) for m in map(_REFERENCE.match, lines) if m}
+
+    body = []
+    paragraph = []
+    list_tag = None
+    in_code = False
+
+    def flush_paragraph():
+        if paragraph:
+            body.append(f"<p>{_inline(' '.join(paragraph), references)}</p>")
+            paragraph.clear()
+
+    def close_list():
+        nonlocal list_tag
+        if list_tag:
+            body.append(f"</{list_tag}>")
+            list_tag = None
+
+    for line in lines:
+        if line.strip().startswith("```"):
+            flush_paragraph()
+            close_list()
+            body.append("</code></pre>" if in_code else "<pre><code>")
+            in_code = not in_code
+            continue
+        if in_code:
+            body.append(html.escape(line))
+            continue
+
+        if not line.strip():
+            flush_paragraph()
+            close_list()
+            continue
+
+        heading = _HEADING.match(line)
+        bullet = _BULLET.match(line)
+        numbered = _NUMBERED.match(line)
+
+        if heading:
+            flush_paragraph()
+            close_list()
+            level = len(heading.group(1))
+            body.append(f"<h{level}>{_inline(heading.group(2), references)}</h{level}>")
+            if title is None and level == 1:
+                title = heading.group(2)
+        elif _RULE.match(line):
+            flush_paragraph()
+            close_list()
+            body.append("<hr>")
+        elif bullet or numbered:
+            flush_paragraph()
+            tag = "ul" if bullet else "ol"
+            if list_tag != tag:
+                close_list()
+                body.append(f"<{tag}>")
+                list_tag = tag
+            item = (bullet or numbered).group(1)
+            ref = _REFERENCE.match(line)
+            anchor = f' id="ref-{ref.group(1)}"' if ref else ""
+            body.append(f"<li{anchor}>{_inline(item, references)}</li>")
+        elif line.lstrip().startswith(">"):
+            flush_paragraph()
+            close_list()
+            body.append(f"<blockquote>{_inline(line.lstrip()[1:].strip(), references)}</blockquote>")
+        else:
+            ref = _REFERENCE.match(line)
+            if ref and list_tag is None:
+                # Reference lines written as "[3] Author, Title, URL"
+                flush_paragraph()
+                body.append(f'<p id="ref-{ref.group(1)}">{_inline(line.strip(), references)}</p>')
+            else:
+                close_list()
+                paragraph.append(line.strip())
+
+    flush_paragraph()
+    close_list()
+    if in_code:
+        body.append("</code></pre>")
+
+    title = re.sub(r"[*_`]", "", title or "Research Report")
+    return (
+        "<!DOCTYPE html>\n"
+        '<html lang="en">\n<head>\n<meta charset="utf-8">\n'
+        f"<title>{html.escape(title)}</title>\n<style>{_STYLE}</style>\n</head>\n<body>\n"
+        + "\n".join(body)
+        + "\n</body>\n</html>"
+    )
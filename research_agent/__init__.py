@@ -0,0 +1,65 @@
+"""
+Importable research pipeline.
+
+Importing this package has no side effects: the OpenAI clients are created on
+first use (see research_agent.client) and heavy modules are only imported when
+one of the names below is first accessed.
+
+    import research_agent
+    report = research_agent.generate_research_report_with_tools("Radio observations of recurrent novae")
+"""
+
+# ================================
+# Standard library imports
+# ================================
+import importlib
+
+# name -> (module, attribute)
+_EXPORTS = {
+    # Synchronous pipeline
+    "generate_research_report_with_tools": ("research_agent.pipeline", "generate_research_report_with_tools"),
+    "reflection_and_rewrite": ("research_agent.pipeline", "reflection_and_rewrite"),
+    "convert_report_to_html": ("research_agent.pipeline", "convert_report_to_html"),
+    "reflect_and_render": ("research_agent.pipeline", "reflect_and_render"),
+    "run_pipeline": ("research_agent.pipeline", "run_pipeline"),
+    "TOOL_MAPPING": ("research_agent.pipeline", "TOOL_MAPPING"),
+    # Async pipeline
+    "async_generate_research_report_with_tools": ("async_pipeline", "generate_research_report_with_tools"),
+    "async_reflection_and_rewrite": ("async_pipeline", "reflection_and_rewrite"),
+    "async_convert_report_to_html": ("async_pipeline", "convert_report_to_html"),
+    "async_reflect_and_render": ("async_pipeline", "reflect_and_render"),
+    "async_run_pipeline": ("async_pipeline", "run_pipeline"),
+    "run_prompts": ("async_pipeline", "run_prompts"),
+    # Tools
+    "arxiv_search_tool": ("research_tools", "arxiv_search_tool"),
+    "web_search_tool": ("research_tools", "web_search_tool"),
+    "arxiv_fetch_tool": ("research_tools", "arxiv_fetch_tool"),
+    "local_paper_search_tool": ("research_tools", "local_paper_search_tool"),
+    "pdf_text_tool": ("research_tools", "pdf_text_tool"),
+    "full_result_tool": ("tool_projection", "full_result_tool"),
+    "arxiv_tool_def": ("research_tools", "arxiv_tool_def"),
+    "web_search_tool_def": ("research_tools", "web_search_tool_def"),
+    "arxiv_fetch_tool_def": ("research_tools", "arxiv_fetch_tool_def"),
+    "local_paper_search_tool_def": ("research_tools", "local_paper_search_tool_def"),
+    "pdf_text_tool_def": ("research_tools", "pdf_text_tool_def"),
+    "full_result_tool_def": ("tool_projection", "full_result_tool_def"),
+    "enable_index": ("research_tools", "enable_index"),
+    # Clients
+    "get_client": ("research_agent.client", "get_client"),
+    "get_async_client": ("research_agent.client", "get_async_client"),
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    module_name, attr = _EXPORTS[name]
+    value = getattr(importlib.import_module(module_name), attr)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,92 @@
+# ================================
+# Standard library imports
+# ================================
+import os
+import threading
+
+BASE_URL = "https://generativelanguage.googleapis.com/v1beta/openai/"
+
+_lock = threading.Lock()
+_client = None
+_async_clients = None
+_router = None
+
+
+def _configure(client):
+    """
+    Applies the optional, environment-driven layers in the same order as the
+    notebook: scheduler, response cache, record/replay, then tracing outermost.
+    """
+    import llm_cache
+    import llm_scheduler
+    import replay
+    import tracing
+
+    llm_scheduler.install_from_env(client)
+    llm_cache.install_from_env(client)
+    replay.install_from_env(client)
+    tracing.install(client)
+    return client
+
+
+def get_client():
+    """
+    Returns the shared OpenAI client, creating it on first use.
+    """
+    global _client
+    with _lock:
+        if _client is None:
+            from dotenv import load_dotenv
+            from openai import OpenAI
+
+            load_dotenv()  # Load environment variables from .env file
+            _client = _configure(OpenAI(api_key=os.getenv("GOOGLE_API_KEY"), base_url=BASE_URL))
+    return _client
+
+
+def _new_async_client():
+    from dotenv import load_dotenv
+    from openai import AsyncOpenAI
+
+    load_dotenv()  # Load environment variables from .env file
+    return _configure(AsyncOpenAI(api_key=os.getenv("GOOGLE_API_KEY"), base_url=BASE_URL))
+
+
+def get_async_client():
+    """
+    Returns the AsyncOpenAI client of the running event loop, creating it on
+    first use. Its connection pool belongs to that loop, so every
+    asyncio.run() gets a client of its own.
+    """
+    global _async_clients
+    with _lock:
+        if _async_clients is None:
+            from http_transport import LoopLocal
+
+            _async_clients = LoopLocal(_new_async_client)
+    return _async_clients.get()
+
+
+def get_router():
+    """
+    Returns the shared model_routing.ModelRouter, configured from the environment on first use.
+    """
+    global _router
+    with _lock:
+        if _router is None:
+            from dotenv import load_dotenv
+
+            from model_routing import ModelRouter
+
+            load_dotenv()  # Load environment variables from .env file
+            _router = ModelRouter.from_env()
+    return _router
+
+
+def set_client(client):
+    """
+    Replaces the shared client (e.g. with a pre-configured or fake one).
+    """
+    global _client
+    with _lock:
+        _client = client
@@ -0,0 +1,213 @@
+# ================================
+# Standard library imports
+# ================================
+import threading
+
+# ================================
+# Local / project imports
+# ================================
+import report_renderer
+import research_tools
+import tracing
+from research_agent.client import get_client, get_router
+from research_agent.prompts import (
+    FUSED_SYSTEM_PROMPT,
+    FUSED_USER_PROMPT,
+    HTML_SYSTEM_PROMPT,
+    HTML_USER_PROMPT,
+    REFLECTION_SYSTEM_PROMPT,
+    REFLECTION_USER_PROMPT,
+)
+from research_agent.run import ResearchRun
+from model_routing import ModelRouter
+from query_planner import fan_out_calls, plan_queries
+from run_budget import RunBudget
+from tool_executor import ToolExecutor
+from tool_projection import full_result_tool
+
+TOOL_MAPPING = {
+    "web_search_tool": research_tools.web_search_tool,
+    "arxiv_search_tool": research_tools.arxiv_search_tool,
+    "arxiv_fetch_tool": research_tools.arxiv_fetch_tool,
+    "local_paper_search_tool": research_tools.local_paper_search_tool,
+    "pdf_text_tool": research_tools.pdf_text_tool,
+    "full_result_tool": full_result_tool,
+}
+
+_executor_lock = threading.Lock()
+_tool_executor = None
+
+
+def get_tool_executor() -> ToolExecutor:
+    """
+    Returns the shared ToolExecutor, starting its thread pool on first use.
+    """
+    global _tool_executor
+    with _executor_lock:
+        if _tool_executor is None:
+            _tool_executor = ToolExecutor(TOOL_MAPPING, max_workers=8, timeout=60)
+    return _tool_executor
+
+
+@tracing.traced("research")
+def generate_research_report_with_tools(
+    prompt: str, model: str | None = None, budget: RunBudget | None = None, plan: bool = False
+) -> str:
+    """
+    Generates a research report using OpenAI's tool-calling with arXiv and web tools.
+
+    Args:
+        prompt (str): The user prompt.
+        model (str | None): Model for every turn; None routes planning and synthesis turns via get_router().
+        budget (RunBudget | None): Deadline, tool-call and token limits (default: RunBudget.from_env()).
+        plan (bool): Plan sub-queries in one call and search them in parallel before the first turn.
+
+    Returns:
+        str: Final assistant research report text.
+    """
+    budget = budget or RunBudget.from_env()
+    router = ModelRouter(model) if model else get_router()
+    run = ResearchRun(prompt, router, budget, TOOL_MAPPING)
+
+    # Planning stage: searches for the planned sub-queries run in parallel before the first turn
+    if plan:
+        queries, plan_response = plan_queries(get_client(), prompt, router.model("plan"))
+        budget.charge(plan_response)
+        run.run_tools(*fan_out_calls(queries), get_tool_executor(), planned=True)
+
+    for turn in range(run.max_turns):
+        response = get_client().chat.completions.create(**run.turn_request(turn))
+        # Malformed tool calls or a drafted answer from the planning model: redo with the synthesis model
+        retry = run.review(response)
+        if retry is not None:
+            response = get_client().chat.completions.create(**retry)
+            run.review(response)
+
+        tool_calls = run.accept(response)
+        if tool_calls is None:
+            break
+        run.run_tools(*tool_calls, get_tool_executor())
+
+    return run.final_text
+
+
+@tracing.traced("reflection")
+def reflection_and_rewrite(report, model: str | None = None, temperature: float = 0.3, stream: bool = False) -> dict:
+    """
+    Generates a structured reflection AND a revised research report.
+    Accepts raw text OR the messages list returned by generate_research_report_with_tools.
+
+    Returns:
+        dict with keys "reflection" and "revised_report", or a
+        research_tools.ReflectionStream when stream=True.
+    """
+    report = research_tools.parse_input(report)
+    model = get_router().resolve(model, "reflection")
+
+    response = get_client().chat.completions.create(
+        model=model,
+        messages=[
+            {"role": "system", "content": REFLECTION_SYSTEM_PROMPT},
+            {"role": "user", "content": REFLECTION_USER_PROMPT.format(report=report)},
+        ],
+        temperature=temperature,
+        stream=stream,
+    )
+
+    if stream:
+        return research_tools.ReflectionStream(tracing.until_consumed(response))
+
+    data = research_tools.parse_json_output(response.choices[0].message.content)
+
+    return {
+        "reflection": str(data.get("reflection", "")).strip(),
+        "revised_report": str(data.get("revised_report", "")).strip(),
+    }
+
+
+@tracing.traced("html")
+def convert_report_to_html(report, model: str | None = None, temperature: float = 0.5, stream: bool = False, local_render: bool = True) -> str:
+    """
+    Converts a plaintext research report into a styled HTML page.
+    Accepts raw text OR the messages list from the tool-calling step.
+    With stream=True, returns a generator of HTML chunks as they arrive.
+    """
+    report = research_tools.parse_input(report)
+
+    # Fast path: standard Markdown needs no LLM round trip
+    if local_render and report_renderer.is_markdown_report(report):
+        html = report_renderer.render_report_html(report)
+        return iter([html]) if stream else html
+
+    model = get_router().resolve(model, "html")
+
+    response = get_client().chat.completions.create(
+        model=model,
+        messages=[
+            {"role": "system", "content": HTML_SYSTEM_PROMPT},
+            {"role": "user", "content": HTML_USER_PROMPT.format(report=report)},
+        ],
+        temperature=temperature,
+        stream=stream,
+    )
+
+    if stream:
+        return tracing.until_consumed(research_tools.iter_stream_text(response))
+
+    return response.choices[0].message.content.strip()
+
+
+@tracing.traced("reflect_and_render")
+def reflect_and_render(report, model: str | None = None, temperature: float = 0.3) -> dict:
+    """
+    Reflects on a report, rewrites it and renders the rewrite as HTML in one LLM call.
+
+    Returns:
+        dict with keys "reflection", "revised_report" and "html".
+    """
+    report = research_tools.parse_input(report)
+    model = get_router().resolve(model, "reflection")
+
+    response = get_client().chat.completions.create(
+        model=model,
+        messages=[
+            {"role": "system", "content": FUSED_SYSTEM_PROMPT},
+            {"role": "user", "content": FUSED_USER_PROMPT.format(report=report)},
+        ],
+        temperature=temperature,
+    )
+
+    data = research_tools.parse_json_output(response.choices[0].message.content)
+
+    revised_report = str(data.get("revised_report", "")).strip()
+    html = str(data.get("html", "")).strip() or report_renderer.render_report_html(revised_report)
+
+    return {
+        "reflection": str(data.get("reflection", "")).strip(),
+        "revised_report": revised_report,
+        "html": html,
+    }
+
+
+def run_pipeline(prompt: str, model: str | None = None, fused: bool = False, plan: bool = False) -> dict:
+    """
+    Runs research → reflection → HTML for a single prompt.
+
+    Returns:
+        dict with keys "prompt", "report", "reflection", "revised_report" and "html".
+    """
+    report = generate_research_report_with_tools(prompt, model=model, plan=plan)
+    if fused:
+        reflection = reflect_and_render(report, model=model)
+        html = reflection["html"]
+    else:
+        reflection = reflection_and_rewrite(report, model=model)
+        html = convert_report_to_html(reflection["revised_report"], model=model)
+
+    return {
+        "prompt": prompt,
+        "report": report,
+        "reflection": reflection["reflection"],
+        "revised_report": reflection["revised_report"],
+        "html": html,
+    }
@@ -0,0 +1,50 @@
+# Prompts shared by the library pipeline (research_agent.pipeline) and the async
+# pipeline. They mirror the prompts used in the graded notebook functions.
+
+RESEARCH_SYSTEM_PROMPT = (
+    "You are a research assistant that can search the web and arXiv to write detailed, "
+    "accurate, and properly sourced research reports.\n\n"
+    "🔍 Use tools when appropriate (e.g., to find scientific papers or web content).\n"
+    "📚 Cite sources whenever relevant. Do NOT omit citations for brevity.\n"
+    "🌐 When possible, include full URLs (arXiv links, web sources, etc.).\n"
+    "✍️ Use an academic tone, organize output into clearly labeled sections, and include "
+    "inline citations or footnotes as needed.\n"
+    "🚫 Do not include placeholder text such as '(citation needed)' or '(citations omitted)'."
+)
+
+REFLECTION_SYSTEM_PROMPT = "You are an academic reviewer and editor."
+
+REFLECTION_USER_PROMPT = """
+    Review the following report and generate a reflection and a revised version.
+    Return ONLY valid JSON with the following structure:
+    {{
+        "reflection": "Your reflection here. MUST include the following 4 sections: 'Strengths:', 'Limitations:', 'Suggestions:', 'Opportunities:'.",
+        "revised_report": "Your revised report here"
+    }}
+
+    Report:
+    {report}
+    """
+
+FUSED_SYSTEM_PROMPT = "You are an academic reviewer and editor who publishes reports as HTML."
+
+FUSED_USER_PROMPT = """
+    Review the following report, generate a reflection and a revised version, and render the revised version as HTML.
+    Return ONLY valid JSON with the following structure:
+    {{
+        "reflection": "Your reflection here. MUST include the following 4 sections: 'Strengths:', 'Limitations:', 'Suggestions:', 'Opportunities:'.",
+        "revised_report": "Your revised report here",
+        "html": "The revised report as a full, clean HTML document with section headers, paragraphs and clickable links"
+    }}
+
+    Report:
+    {report}
+    """
+
+HTML_SYSTEM_PROMPT = "You convert plaintext reports into full clean HTML documents."
+
+HTML_USER_PROMPT = (
+    "Convert the following research report into a full, clean HTML document. "
+    "Return ONLY the HTML code, no markdown backticks or explanations.\n\nReport:\n{report}"
+)
+
@@ -0,0 +1,177 @@
+# ================================
+# Standard library imports
+# ================================
+import json
+
+# ================================
+# Local / project imports
+# ================================
+import research_tools
+from research_agent.prompts import RESEARCH_SYSTEM_PROMPT
+from context_compaction import ContextCompactor
+from model_routing import ModelRouter
+from query_planner import seed_messages
+from result_merge import ResultMerger
+from run_budget import TOOL_BUDGET_EXCEEDED, RunBudget
+from tool_memo import ToolCallMemo
+from tool_projection import ToolResultProjector
+
+
+class ResearchRun:
+    """
+    State and per-turn steps of one tool-calling research run, shared by the
+    sync and async pipelines and the notebook.
+
+    The pipelines only make the model and tool calls; everything in between
+    goes through here: compaction and the final-turn decision before a turn,
+    budget charging and escalation after it, and for tool calls the sequence
+    budget -> memo -> executor -> merge -> project -> tool messages. As in
+    ToolCallMemo, the steps around the call are shared and only tool_results()
+    / async_tool_results() differ. The graded notebook uses the same steps
+    but builds the tool messages itself.
+
+    Args:
+        prompt (str): The user prompt.
+        router (ModelRouter): Chooses the planning and synthesis models.
+        budget (RunBudget): Deadline, tool-call and token limits of the run.
+        tool_names: Tools the model may call (for spotting malformed calls).
+        max_turns (int): Model turns before the report is forced.
+    """
+
+    def __init__(self, prompt: str, router: ModelRouter, budget: RunBudget, tool_names, max_turns: int = 10):
+        self.messages = [
+            {"role": "system", "content": RESEARCH_SYSTEM_PROMPT},
+            {"role": "user", "content": prompt},
+        ]
+        self.tools = research_tools.search_tool_defs()
+        self.router = router
+        self.budget = budget
+        self.tool_names = tool_names
+        self.max_turns = max_turns
+        self.projector = ToolResultProjector()
+        self.memo = ToolCallMemo()
+        self.merger = ResultMerger()
+        self.compactor = ContextCompactor()
+        self.turn_model = None
+        self.final_turn = False
+        self.final_text = ""
+
+    def turn_request(self, turn: int) -> dict:
+        """
+        Compacts the history and returns the chat.completions.create kwargs of `turn`.
+        """
+        self.projector.release(self.compactor.compact(self.messages))
+        # Last turn or budget nearly spent: ask for the report without further tools
+        self.final_turn = turn == self.max_turns - 1 or self.budget.should_finalize()
+        self.turn_model = self.router.turn_model(self.final_turn)
+        return {
+            "model": self.turn_model,
+            "messages": self.messages,
+            "tools": self.tools,
+            "tool_choice": "none" if self.final_turn else "auto",
+            "temperature": 1,
+        }
+
+    def review(self, response) -> dict | None:
+        """
+        Charges `response` to the budget and returns the kwargs to redo the turn
+        with, or None if it can be used. Malformed tool calls or a drafted answer
+        from the planning model are redone with the synthesis model (the latter
+        as the final answer, without tools); its own answers are never redone.
+        """
+        self.budget.charge(response)
+        escalation = self.router.escalation(response.choices[0].message, self.turn_model, self.tool_names)
+        if escalation is None:
+            return None
+        self.turn_model, tool_choice = escalation
+        self.final_turn = self.final_turn or tool_choice == "none"
+        return {
+            "model": self.turn_model,
+            "messages": self.messages,
+            "tools": self.tools,
+            "tool_choice": tool_choice,
+            "temperature": 1,
+        }
+
+    def accept(self, response) -> tuple[list, list[str]] | None:
+        """
+        Appends the turn's message. Returns its (calls, call_ids), calls being
+        (tool_name, args) pairs, or None once it is the final answer (then
+        stored in final_text).
+        """
+        msg = response.choices[0].message
+        self.messages.append(msg)
+        # Stop when the assistant returns a final answer (no tool calls, or tools were disabled)
+        if not msg.tool_calls or self.final_turn:
+            self.final_text = msg.content or ""
+            return None
+        calls = [(call.function.name, json.loads(call.function.arguments)) for call in msg.tool_calls]
+        return calls, [call.id for call in msg.tool_calls]
+
+    def _tool_turn(self, calls: list, call_ids: list[str], planned: bool):
+        """
+        Reserves budget for the calls and returns (calls_to_run, their ids,
+        finish), where finish(results) merges and projects the results and
+        returns one per call. Planned searches beyond the budget are dropped
+        and the rest are seeded into the history; the model's own calls get
+        TOOL_BUDGET_EXCEEDED so that every tool_call_id is answered.
+        """
+        allowed = self.budget.take_tool_calls(len(calls))
+        if planned:
+            calls, call_ids = calls[:allowed], call_ids[:allowed]
+
+        def finish(results):
+            results = list(results) + [TOOL_BUDGET_EXCEEDED] * (len(calls) - allowed)
+            results = self.merger.merge(calls, call_ids, results)
+            results = [self.projector.project(tool_name, result) for (tool_name, _), result in zip(calls, results)]
+            if planned and calls:
+                self.messages.extend(seed_messages(calls, call_ids, results))
+            return results
+
+        return calls[:allowed], call_ids[:allowed], finish
+
+    def tool_results(self, calls: list, call_ids: list[str], executor, planned: bool = False) -> list:
+        """
+        Runs tool calls on a ToolExecutor and returns their merged, projected
+        results, one per call, without adding tool messages. With planned=True
+        the calls are query_planner fan-out searches, which are added to the
+        history as a seeded assistant turn.
+        """
+        to_run, run_ids, finish = self._tool_turn(calls, call_ids, planned)
+        timeout = self.budget.tool_timeout(executor.timeout)
+        return finish(self.memo.run(to_run, run_ids, lambda batch: executor.run(batch, timeout=timeout)))
+
+    async def async_tool_results(self, calls: list, call_ids: list[str], executor, planned: bool = False) -> list:
+        """
+        Async counterpart of tool_results() for AsyncToolExecutor.
+        """
+        to_run, run_ids, finish = self._tool_turn(calls, call_ids, planned)
+        timeout = self.budget.tool_timeout(executor.timeout)
+        return finish(await self.memo.async_run(to_run, run_ids, lambda batch: executor.run(batch, timeout=timeout)))
+
+    def add_tool_messages(self, calls: list, call_ids: list[str], results: list):
+        for call_id, (tool_name, _), result in zip(call_ids, calls, results):
+            self.messages.append(
+                {
+                    "role": "tool",
+                    "tool_call_id": call_id,
+                    "name": tool_name,
+                    "content": json.dumps(result),
+                }
+            )
+
+    def run_tools(self, calls: list, call_ids: list[str], executor, planned: bool = False):
+        """
+        tool_results() followed by the tool messages of a model turn.
+        """
+        results = self.tool_results(calls, call_ids, executor, planned)
+        if not planned:
+            self.add_tool_messages(calls, call_ids, results)
+
+    async def async_run_tools(self, calls: list, call_ids: list[str], executor, planned: bool = False):
+        """
+        Async counterpart of run_tools() for AsyncToolExecutor.
+        """
+        results = await self.async_tool_results(calls, call_ids, executor, planned)
+        if not planned:
+            self.add_tool_messages(calls, call_ids, results)
@@ -1,26 +1,203 @@
 # ================================
 # Standard library imports
 # ================================
+import asyncio
+import functools
+import importlib.util
+import inspect
+import json
 import os
+import re
+import threading
+import time
 import xml.etree.ElementTree as ET
 
 # ================================
 # Third-party imports
 # ================================
+import httpx
 import requests
-from duckduckgo_search import DDGS
 
-session = requests.Session()
-session.headers.update(
-    {"User-Agent": "LF-ADP-Agent/1.0 (mailto:your.email@example.com)"}
-)
+# ================================
+# Local / project imports
+# ================================
+import http_transport
+import tracing
+from paper_index import DEFAULT_INDEX_PATH, PaperIndex
+from pdf_text import DEFAULT_PDF_DIR, PdfStore, select_sections
+from records import PaperRecord
+from tool_cache import DEFAULT_CACHE_PATH, ToolCache
+from tool_projection import full_result_tool_def
+
+USER_AGENT = "LF-ADP-Agent/1.0 (mailto:your.email@example.com)"
+
+# Shared HTTP transport: pooled connections, per-host rate limits (arXiv's
+# 1 request / 3 s policy) and jittered retries on 429/503
+session = http_transport.RateLimitedSession(pool_connections=10, pool_maxsize=20, retries=3)
+session.headers.update({"User-Agent": USER_AGENT})
+
+# Async HTTP clients for the async_* tools (httpx ships with openai), one per
+# event loop and rate-limited through the same per-host buckets as `session`
+_async_sessions = http_transport.LoopLocal(lambda: http_transport.AsyncRateLimitedClient(headers={"User-Agent": USER_AGENT}))
+
+
+def get_async_session() -> http_transport.AsyncRateLimitedClient:
+    """
+    Returns the async HTTP client of the running event loop.
+    """
+    return _async_sessions.get()
+
+
+# duckduckgo_search is imported on first use (see _ddgs) to keep imports fast
+DDGS = None
+
+
+def _ddgs():
+    global DDGS
+    if DDGS is None:
+        from duckduckgo_search import DDGS as _DDGS
+
+        DDGS = _DDGS
+    return DDGS
+
+
+# Optional on-disk result cache shared by the search tools. Disabled unless
+# RESEARCH_TOOLS_CACHE points at a cache file or enable_cache() is called.
+cache = ToolCache(os.environ["RESEARCH_TOOLS_CACHE"]) if os.getenv("RESEARCH_TOOLS_CACHE") else None
+
+
+def enable_cache(path: str = DEFAULT_CACHE_PATH, ttl: float = 24 * 3600, max_entries: int = 10_000) -> ToolCache:
+    """
+    Turns on the on-disk search cache for every tool in this module.
+    """
+    global cache
+    cache = ToolCache(path, ttl=ttl, max_entries=max_entries)
+    return cache
+
+
+def disable_cache():
+    global cache
+    cache = None
+
+
+# Optional local full-text index of every arXiv record the tools have returned.
+# Disabled unless RESEARCH_TOOLS_INDEX points at an index file or enable_index() is called.
+index = PaperIndex(os.environ["RESEARCH_TOOLS_INDEX"]) if os.getenv("RESEARCH_TOOLS_INDEX") else None
+
+
+def enable_index(path: str = DEFAULT_INDEX_PATH) -> PaperIndex:
+    """
+    Turns on the local paper index: arXiv results are stored in it and
+    local_paper_search_tool is offered to the model.
+    """
+    global index
+    index = PaperIndex(path)
+    return index
+
+
+def disable_index():
+    global index
+    index = None
+
+
+def _index_results(results: list[dict]) -> list[dict]:
+    if index is not None:
+        index.add(results)
+    return results
+
+
+def _cached(tool_name: str):
+    """
+    Serves a search tool from the module cache when it is enabled.
+    Works for both plain and async tools.
+    """
+
+    def decorator(func):
+        if inspect.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def async_wrapper(query: str, max_results: int = 5):
+                if cache is None:
+                    return await func(query, max_results)
+                result = cache.get(tool_name, query, max_results)
+                tracing.annotate(cache_hit=result is not None)
+                if result is None:
+                    result = await func(query, max_results)
+                    cache.set(tool_name, query, max_results, result)
+                return result
+
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(query: str, max_results: int = 5):
+            if cache is None:
+                return func(query, max_results)
+            result = cache.get(tool_name, query, max_results)
+            tracing.annotate(cache_hit=result is not None)
+            if result is None:
+                result = func(query, max_results)
+                cache.set(tool_name, query, max_results, result)
+            return result
+
+        return wrapper
+
+    return decorator
+
+
+ARXIV_API_URL = "https://export.arxiv.org/api/query"
+ATOM_NS = {"atom": "http://www.w3.org/2005/Atom"}
+
+
+def _arxiv_query_url(query: str, max_results: int = 5, start: int = 0) -> str:
+    return f"{ARXIV_API_URL}?search_query=all:{query}&start={start}&max_results={max_results}"
+
+
+def _parse_arxiv_entry(entry) -> dict:
+    ns = ATOM_NS
+    title = entry.find("atom:title", ns).text.strip()
+    authors = [
+        author.find("atom:name", ns).text
+        for author in entry.findall("atom:author", ns)
+    ]
+    published = entry.find("atom:published", ns).text[:10]
+    url_abstract = entry.find("atom:id", ns).text
+    summary = entry.find("atom:summary", ns).text.strip()
+
+    link_pdf = None
+    for link in entry.findall("atom:link", ns):
+        if link.attrib.get("title") == "pdf":
+            link_pdf = link.attrib.get("href")
+            break
+
+    return {
+        "title": title,
+        "authors": authors,
+        "published": published,
+        "url": url_abstract,
+        "summary": summary,
+        "link_pdf": link_pdf,
+    }
+
+
+def _parse_arxiv_feed(content: bytes) -> list[dict]:
+    try:
+        root = ET.fromstring(content)
+        return [
+            _parse_arxiv_entry(entry)
+            for entry in root.findall("atom:entry", ATOM_NS)
+            # The API reports bad or unknown ids as entries under /api/errors
+            if "/api/errors" not in (entry.findtext("atom:id", "", ATOM_NS))
+        ]
+    except Exception as e:
+        return [{"error": f"Parsing failed: {str(e)}"}]
 
 
+@_cached("arxiv_search_tool")
 def arxiv_search_tool(query: str, max_results: int = 5) -> list[dict]:
     """
     Searches arXiv for research papers matching the given query.
     """
-    url = f"https://export.arxiv.org/api/query?search_query=all:{query}&start=0&max_results={max_results}"
+    url = _arxiv_query_url(query, max_results)
 
     try:
         response = session.get(url, timeout=30)
@@ -28,41 +205,186 @@ def arxiv_search_tool(query: str, max_results: int = 5) -> list[dict]:
     except requests.exceptions.RequestException as e:
         return [{"error": str(e)}]
 
-    try:
-        root = ET.fromstring(response.content)
-        ns = {"atom": "http://www.w3.org/2005/Atom"}
-
-        results = []
-        for entry in root.findall("atom:entry", ns):
-            title = entry.find("atom:title", ns).text.strip()
-            authors = [
-                author.find("atom:name", ns).text
-                for author in entry.findall("atom:author", ns)
-            ]
-            published = entry.find("atom:published", ns).text[:10]
-            url_abstract = entry.find("atom:id", ns).text
-            summary = entry.find("atom:summary", ns).text.strip()
-
-            link_pdf = None
-            for link in entry.findall("atom:link", ns):
-                if link.attrib.get("title") == "pdf":
-                    link_pdf = link.attrib.get("href")
-                    break
+    return _index_results(_parse_arxiv_feed(response.content))
 
-            results.append(
-                {
-                    "title": title,
-                    "authors": authors,
-                    "published": published,
-                    "url": url_abstract,
-                    "summary": summary,
-                    "link_pdf": link_pdf,
-                }
-            )
 
-        return results
-    except Exception as e:
-        return [{"error": f"Parsing failed: {str(e)}"}]
+ARXIV_ID_CHUNK = 100
+
+
+# Paper id in arXiv abs/pdf/html URLs, including mirrors such as ar5iv.labs.arxiv.org
+_ARXIV_URL = re.compile(r"arxiv\.org/(?:abs|pdf|html)/([^?#]+?)(?:\.pdf)?/?(?:[?#].*)?$")
+
+
+def arxiv_id(ref: str) -> str:
+    """
+    Bare arXiv id from an id or an abs/pdf/html URL,
+    e.g. "https://arxiv.org/pdf/2101.00001v2.pdf" -> "2101.00001v2".
+    Anything else is returned unchanged.
+    """
+    ref = ref.strip()
+    match = _ARXIV_URL.search(ref)
+    return match.group(1) if match else ref
+
+
+def _arxiv_id_list_urls(ids: list[str], chunk_size: int = ARXIV_ID_CHUNK) -> list[str]:
+    ids = list(dict.fromkeys(arxiv_id(i) for i in ids if i))
+    return [
+        f"{ARXIV_API_URL}?id_list={','.join(ids[i:i + chunk_size])}&max_results={len(ids[i:i + chunk_size])}"
+        for i in range(0, len(ids), chunk_size)
+    ]
+
+
+def arxiv_fetch_tool(ids: list[str], chunk_size: int = ARXIV_ID_CHUNK) -> list[dict]:
+    """
+    Fetches arXiv papers by id in bulk, `chunk_size` ids per request via the
+    API's id_list parameter (500 ids -> 5 requests).
+
+    Args:
+        ids (list[str]): arXiv ids or abs/pdf/html URLs. Duplicates are fetched once.
+        chunk_size (int): Ids per API request.
+
+    Returns:
+        list[dict]: Records in the arxiv_search_tool shape. A failed chunk adds
+        one {"error": ...} record; the other chunks are still returned.
+    """
+    results = []
+    for url in _arxiv_id_list_urls(ids, chunk_size):
+        try:
+            response = session.get(url, timeout=30)
+            response.raise_for_status()
+        except requests.exceptions.RequestException as e:
+            results.append({"error": str(e)})
+            continue
+        results.extend(_parse_arxiv_feed(response.content))
+    return _index_results(results)
+
+
+async def async_arxiv_fetch_tool(ids: list[str], chunk_size: int = ARXIV_ID_CHUNK) -> list[dict]:
+    """
+    Async version of arxiv_fetch_tool. Chunks are requested concurrently; the
+    shared per-host rate limit still spaces them out.
+    """
+    async def fetch(url: str) -> list[dict]:
+        try:
+            response = await get_async_session().get(url, timeout=30)
+            response.raise_for_status()
+        except httpx.HTTPError as e:
+            return [{"error": str(e)}]
+        return _parse_arxiv_feed(response.content)
+
+    pages = await asyncio.gather(*(fetch(url) for url in _arxiv_id_list_urls(ids, chunk_size)))
+    return _index_results([record for page in pages for record in page])
+
+
+arxiv_fetch_tool_def = {
+    "type": "function",
+    "function": {
+        "name": "arxiv_fetch_tool",
+        "description": "Fetches the metadata of specific arXiv papers by id (e.g. 2101.00001) or arXiv URL, many at once.",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "ids": {
+                    "type": "array",
+                    "items": {"type": "string"},
+                    "description": "arXiv ids or arXiv abs/pdf URLs.",
+                },
+            },
+            "required": ["ids"],
+        },
+    },
+}
+
+
+def iter_arxiv_results(
+    query: str,
+    max_results: int | None = None,
+    page_size: int = 100,
+    start: int = 0,
+    delay: float = 0.0,
+    as_records: bool = False,
+):
+    """
+    Streams arXiv results page by page, yielding each paper as soon as its
+    <entry> element has been parsed.
+
+    Args:
+        query (str): Search keywords.
+        max_results (int | None): Stop after this many papers (None = all results).
+        page_size (int): Number of results requested per API call.
+        start (int): Offset of the first result.
+        delay (float): Extra seconds to wait between pages, on top of the
+            per-host rate limit the shared session already enforces.
+        as_records (bool): Yield slotted PaperRecords instead of dicts, for
+            harvests too large to keep as dicts.
+
+    Yields:
+        dict | PaperRecord: Paper records in the same shape as
+        arxiv_search_tool. A failure yields a single {"error": ...} dict and
+        stops the iteration.
+    """
+    entry_tag = f"{{{ATOM_NS['atom']}}}entry"
+    total_tag = "{http://a9.com/-/spec/opensearch/1.1/}totalResults"
+    yielded = 0
+    total = None
+
+    while max_results is None or yielded < max_results:
+        if total is not None and start >= total:
+            return
+        batch = page_size if max_results is None else min(page_size, max_results - yielded)
+        url = _arxiv_query_url(query, batch, start)
+
+        try:
+            response = session.get(url, timeout=30, stream=True)
+            response.raise_for_status()
+        except requests.exceptions.RequestException as e:
+            yield {"error": str(e)}
+            return
+
+        page_count = 0
+        try:
+            with response:
+                response.raw.decode_content = True
+                root = None
+                for event, elem in ET.iterparse(response.raw, events=("start", "end")):
+                    if event == "start":
+                        if root is None:
+                            root = elem
+                        continue
+                    if elem.tag == total_tag and elem.text:
+                        total = int(elem.text)
+                    elif elem.tag == entry_tag:
+                        record = _parse_arxiv_entry(elem)
+                        # Drop the parsed entry so memory stays flat across pages.
+                        root.remove(elem)
+                        page_count += 1
+                        yielded += 1
+                        yield PaperRecord.from_dict(record) if as_records else record
+        except Exception as e:
+            yield {"error": f"Parsing failed: {str(e)}"}
+            return
+
+        if page_count < batch:
+            return
+        start += page_count
+        if delay:
+            time.sleep(delay)
+
+
+@_cached("arxiv_search_tool")
+async def async_arxiv_search_tool(query: str, max_results: int = 5) -> list[dict]:
+    """
+    Async version of arxiv_search_tool, using the shared httpx.AsyncClient.
+    """
+    url = _arxiv_query_url(query, max_results)
+
+    try:
+        response = await get_async_session().get(url, timeout=30)
+        response.raise_for_status()
+    except httpx.HTTPError as e:
+        return [{"error": str(e)}]
+
+    return _index_results(_parse_arxiv_feed(response.content))
 
 
 arxiv_tool_def = {
@@ -88,6 +410,165 @@ arxiv_tool_def = {
     },
 }
 
+def local_paper_search_tool(query: str, max_results: int = 5) -> list[dict]:
+    """
+    Searches the local full-text index of previously harvested arXiv papers,
+    ranked by BM25. No network access.
+    """
+    if index is None:
+        return [{"error": "Local paper index is not enabled."}]
+    try:
+        return index.search(query, max_results)
+    except Exception as e:
+        return [{"error": str(e)}]
+
+
+local_paper_search_tool_def = {
+    "type": "function",
+    "function": {
+        "name": "local_paper_search_tool",
+        "description": (
+            "Searches a local index of arXiv papers that were already retrieved. "
+            "Fast and offline: call this first, and use arxiv_search_tool only when "
+            "it returns nothing relevant."
+        ),
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "query": {
+                    "type": "string",
+                    "description": "Search keywords for research papers.",
+                },
+                "max_results": {
+                    "type": "integer",
+                    "description": "Maximum number of results to return.",
+                    "default": 5,
+                },
+            },
+            "required": ["query"],
+        },
+    },
+}
+
+
+# pdf_text_tool is offered only when its optional dependency is installed
+PDF_SUPPORT = importlib.util.find_spec("pypdf") is not None
+
+# Most PDFs one pdf_text_tool call downloads; further URLs get an error record
+MAX_PDF_URLS = 5
+
+# Content-addressed PDF cache, created on first use
+_pdf_store = None
+_pdf_store_lock = threading.Lock()
+
+
+def _pdfs() -> PdfStore:
+    global _pdf_store
+    with _pdf_store_lock:
+        if _pdf_store is None:
+            _pdf_store = PdfStore(os.getenv("RESEARCH_TOOLS_PDF_DIR", DEFAULT_PDF_DIR))
+    return _pdf_store
+
+
+def pdf_url(ref: str) -> str:
+    """
+    PDF URL for an arXiv id or abs/pdf/html URL; other URLs are returned unchanged.
+    """
+    ref = ref.strip()
+    paper_id = arxiv_id(ref)
+    if ref.startswith("http") and paper_id == ref:
+        return ref
+    return f"https://arxiv.org/pdf/{paper_id}"
+
+
+def pdf_text_tool(urls: list[str], query: str = "", max_chars: int = 12000) -> list[dict]:
+    """
+    Downloads papers' PDFs concurrently and returns the passages most relevant
+    to `query`, sharing `max_chars` evenly between the documents.
+
+    Args:
+        urls (list[str]): PDF URLs (e.g. link_pdf), arXiv abs/html URLs or arXiv ids;
+            only the first MAX_PDF_URLS are read.
+        query (str): What to look for; ranks the passages of each paper.
+        max_chars (int): Total text budget across all documents.
+
+    Returns:
+        list[dict]: One {"url", "text", "truncated"} record per document, with
+        "[p. N]" page markers in the text, or {"url", "error"} on failure.
+    """
+    urls = [pdf_url(u) for u in urls]
+    if not urls:
+        return []
+    if not PDF_SUPPORT:
+        # Nothing could be extracted, so don't download anything
+        return [{"url": url, "error": "pdf_text_tool needs the pypdf package."} for url in urls]
+    skipped = [
+        {"url": url, "error": f"Not read: at most {MAX_PDF_URLS} PDFs per call."}
+        for url in urls[MAX_PDF_URLS:]
+    ]
+    urls = urls[:MAX_PDF_URLS]
+    budget = max_chars // len(urls)
+
+    results = []
+    for url, pages in zip(urls, _pdfs().fetch_pages(urls, session)):
+        if isinstance(pages, Exception):
+            results.append({"url": url, "error": str(pages)})
+        else:
+            text, truncated = select_sections(pages, query, budget)
+            results.append({"url": url, "text": text, "truncated": truncated})
+    return results + skipped
+
+
+async def async_pdf_text_tool(urls: list[str], query: str = "", max_chars: int = 12000) -> list[dict]:
+    """
+    Async version of pdf_text_tool; the downloads and extraction already run on
+    their own pools, so only the wait is moved off the event loop.
+    """
+    return await asyncio.to_thread(pdf_text_tool, urls, query, max_chars)
+
+
+pdf_text_tool_def = {
+    "type": "function",
+    "function": {
+        "name": "pdf_text_tool",
+        "description": (
+            "Reads the full text of papers (PDF) and returns the passages most relevant to a query, "
+            "with page numbers. Use it on the most important papers found by the search tools."
+        ),
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "urls": {
+                    "type": "array",
+                    "items": {"type": "string"},
+                    "maxItems": MAX_PDF_URLS,
+                    "description": f"PDF links (link_pdf), arXiv URLs or arXiv ids (at most {MAX_PDF_URLS}).",
+                },
+                "query": {
+                    "type": "string",
+                    "description": "What to look for in the papers.",
+                },
+            },
+            "required": ["urls", "query"],
+        },
+    },
+}
+
+
+def search_tool_defs() -> list[dict]:
+    """
+    Tool definitions to offer the model; the local index comes first when
+    enabled, and pdf_text_tool is only offered when pypdf is installed.
+    """
+    defs = [arxiv_tool_def, arxiv_fetch_tool_def, web_search_tool_def, full_result_tool_def]
+    if PDF_SUPPORT:
+        defs.insert(3, pdf_text_tool_def)
+    if index is not None:
+        defs.insert(0, local_paper_search_tool_def)
+    return defs
+
+
+@_cached("web_search_tool")
 def web_search_tool(query: str, max_results: int = 5) -> list[dict]:
     """
     Perform a search using DuckDuckGo.
@@ -100,7 +581,14 @@ def web_search_tool(query: str, max_results: int = 5) -> list[dict]:
         list[dict]: A list of dictionaries with keys like 'title', 'content', and 'url'.
     """
     try:
-        results = DDGS().text(query, max_results=max_results)
+        from duckduckgo_search.exceptions import RatelimitException
+
+        # DDGS uses its own HTTP client, so only the rate limit and retries apply here
+        results = http_transport.call_with_retries(
+            lambda: _ddgs()().text(query, max_results=max_results),
+            host="duckduckgo.com",
+            retry_on=(RatelimitException,),
+        )
         return [
             {
                 "title": r.get("title", ""),
@@ -112,6 +600,15 @@ def web_search_tool(query: str, max_results: int = 5) -> list[dict]:
     except Exception as e:
         return [{"error": str(e)}]
 
+async def async_web_search_tool(query: str, max_results: int = 5) -> list[dict]:
+    """
+    Async version of web_search_tool.
+
+    duckduckgo_search only ships a blocking client, so the search runs on the
+    event loop's default (bounded) executor instead of blocking the loop.
+    """
+    return await asyncio.to_thread(web_search_tool, query, max_results)
+
 web_search_tool_def = {
     "type": "function",
     "function": {
@@ -154,3 +651,139 @@ def parse_input(text_or_messages):
         text_report = str(text_or_messages)
 
     return text_report
+
+
+def parse_json_output(llm_output: str) -> dict:
+    """
+    Parses a JSON object out of an LLM reply, tolerating markdown code fences
+    and stray text around the object.
+    """
+    llm_output = llm_output.strip()
+
+    # Clean up markdown code blocks if present
+    if llm_output.startswith("```json"):
+        llm_output = llm_output[7:]
+    if llm_output.startswith("```"):
+        llm_output = llm_output[3:]
+    if llm_output.endswith("```"):
+        llm_output = llm_output[:-3]
+
+    llm_output = llm_output.strip()
+
+    # Check if output is valid JSON
+    try:
+        return json.loads(llm_output)
+    except json.JSONDecodeError:
+        # Fallback: try to find the start and end of the JSON object
+        try:
+            start = llm_output.find("{")
+            end = llm_output.rfind("}") + 1
+            if start != -1 and end != -1:
+                return json.loads(llm_output[start:end])
+            else:
+                raise
+        except:
+             raise Exception(f"The output of the LLM was not valid JSON. Output: {llm_output[:100]}...")
+
+
+def iter_stream_text(stream):
+    """
+    Yields the text deltas of a streamed chat completion (stream=True).
+    """
+    for chunk in stream:
+        if not chunk.choices:
+            continue
+        delta = chunk.choices[0].delta.content
+        if delta:
+            yield delta
+
+
+class JsonStringFieldDecoder:
+    """
+    Incrementally decodes the string value of one top-level key while the JSON
+    document around it is still arriving.
+
+    feed() takes the next piece of raw model output and returns whatever part of
+    the decoded value became available; escape sequences split across pieces
+    are held back until complete.
+    """
+
+    _ESCAPES = {'"': '"', "\\": "\\", "/": "/", "b": "\b", "f": "\f", "n": "\n", "r": "\r", "t": "\t"}
+
+    def __init__(self, field: str):
+        self._key = re.compile(r'"' + re.escape(field) + r'"\s*:\s*"')
+        self._buffer = ""
+        self._pos = None
+        self.done = False
+
+    def feed(self, text: str) -> str:
+        self._buffer += text
+        if self.done:
+            return ""
+        if self._pos is None:
+            match = self._key.search(self._buffer)
+            if not match:
+                return ""
+            self._pos = match.end()
+
+        out = []
+        buf, i = self._buffer, self._pos
+        while i < len(buf):
+            c = buf[i]
+            if c == '"':
+                self.done = True
+                i += 1
+                break
+            if c != "\\":
+                out.append(c)
+                i += 1
+                continue
+            if i + 1 >= len(buf):
+                break
+            esc = buf[i + 1]
+            if esc != "u":
+                out.append(self._ESCAPES.get(esc, esc))
+                i += 2
+                continue
+            # \uXXXX, possibly the first half of a surrogate pair
+            if i + 6 > len(buf):
+                break
+            length = 6
+            if 0xD800 <= int(buf[i + 2:i + 6], 16) <= 0xDBFF:
+                if i + 12 > len(buf):
+                    break
+                length = 12
+            out.append(json.loads('"' + buf[i:i + length] + '"'))
+            i += length
+
+        self._pos = i
+        return "".join(out)
+
+
+class ReflectionStream:
+    """
+    Iterates over the "revised_report" text of a streamed reflection while the
+    JSON is still arriving. Once iteration finishes, `result` holds the same
+    dict the non-streaming reflection_and_rewrite returns.
+    """
+
+    def __init__(self, stream):
+        self._stream = stream
+        self.raw = ""
+        self.result = None
+
+    def __iter__(self):
+        decoder = JsonStringFieldDecoder("revised_report")
+        parts = []
+        for delta in iter_stream_text(self._stream):
+            parts.append(delta)
+            chunk = decoder.feed(delta)
+            if chunk:
+                yield chunk
+
+        self.raw = "".join(parts)
+        data = parse_json_output(self.raw)
+        self.result = {
+            "reflection": str(data.get("reflection", "")).strip(),
+            "revised_report": str(data.get("revised_report", "")).strip(),
+        }
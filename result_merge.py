@@ -0,0 +1,156 @@
+# ================================
+# Standard library imports
+# ================================
+import math
+import re
+from collections import Counter
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+# Tools whose results are paper/web records that can be merged, in the order
+# their copies win when the same work comes back from several sources.
+MERGE_TOOLS = ("arxiv_fetch_tool", "arxiv_search_tool", "local_paper_search_tool", "web_search_tool")
+
+ARXIV_HOSTS = ("arxiv.org", "export.arxiv.org", "ar5iv.org", "ar5iv.labs.arxiv.org", "alphaxiv.org")
+_ARXIV_PATH = re.compile(r"^/(?:abs|pdf|html|overview)/(.+?)(?:v\d+)?(?:\.pdf)?/?$")
+_TRACKING_PARAMS = re.compile(r"^(utm_\w+|ref|ref_src|fbclid|gclid)$")
+
+_STOPWORDS = frozenset(
+    "the and for with from that this are was were has have its into our their these those using use "
+    "via can not but all any also been such than then there which while what when who how of on in "
+    "to a an is it by as at or be we".split()
+)
+
+
+def canonical_url(url: str) -> str:
+    """
+    Normalized identity of a URL: arXiv abstract, PDF and HTML pages (and
+    their mirrors and versions) map to "arxiv:<id>"; other URLs lose scheme,
+    "www.", fragments, tracking parameters and trailing slashes.
+    """
+    parts = urlsplit(url.strip())
+    host = (parts.hostname or "").lower().removeprefix("www.")
+    if host in ARXIV_HOSTS:
+        match = _ARXIV_PATH.match(parts.path)
+        if match:
+            return f"arxiv:{match.group(1)}"
+    query = urlencode(sorted((k, v) for k, v in parse_qsl(parts.query) if not _TRACKING_PARAMS.match(k)))
+    return f"{host}{parts.path.rstrip('/')}" + (f"?{query}" if query else "")
+
+
+def _terms(text: str) -> Counter:
+    return Counter(w for w in re.findall(r"\w{2,}", text.lower()) if w not in _STOPWORDS)
+
+
+def _record_text(record: dict) -> str:
+    return f"{record.get('title', '')} {record.get('summary') or record.get('content') or ''}"
+
+
+def _tfidf(counts: Counter, idf: dict) -> dict:
+    vector = {term: (1 + math.log(n)) * idf.get(term, 0.0) for term, n in counts.items()}
+    norm = math.sqrt(sum(v * v for v in vector.values())) or 1.0
+    return {term: v / norm for term, v in vector.items()}
+
+
+def cosine(a: dict, b: dict) -> float:
+    """
+    Cosine similarity of two L2-normalized sparse vectors.
+    """
+    if len(a) > len(b):
+        a, b = b, a
+    return sum(v * b.get(term, 0.0) for term, v in a.items())
+
+
+class ResultMerger:
+    """
+    Per-conversation deduplication and reranking of search results.
+
+    Every record of a turn is keyed by its canonical URL / arXiv id and turned
+    into a TF-IDF vector over title and summary (or snippet). Records whose key
+    or vector (cosine >= threshold) matches a record already delivered are
+    collapsed: within a call they become "also_at" URLs on the surviving copy,
+    across calls and turns they shrink to a {title, url, duplicate_of} stub.
+    What remains of each call is reranked by similarity to that call's query.
+    Sparse pure-Python vectors are plenty for the tens of records per turn.
+    """
+
+    def __init__(self, threshold: float = 0.8):
+        self.threshold = threshold
+        self.collapsed = 0
+        # canonical key -> tool_call_id that delivered it
+        self._keys = {}
+        # (tool_call_id, term counts) of delivered records
+        self._delivered = []
+
+    def merge(self, calls: list[tuple[str, dict]], call_ids: list[str], results: list) -> list:
+        """
+        Returns `results` (one per call, same order) with duplicates collapsed
+        and records reranked. Non-mergeable tools and errors pass through.
+        """
+        mergeable = [
+            i for i, ((tool_name, _), result) in enumerate(zip(calls, results))
+            if tool_name in MERGE_TOOLS and isinstance(result, list)
+        ]
+        if not mergeable:
+            return results
+
+        counts = {
+            (i, j): _terms(_record_text(record))
+            for i in mergeable
+            for j, record in enumerate(results[i])
+            if isinstance(record, dict) and "error" not in record
+        }
+        documents = list(counts.values()) + [c for _, c in self._delivered]
+        df = Counter(term for c in documents for term in c)
+        idf = {term: math.log((1 + len(documents)) / (1 + n)) + 1 for term, n in df.items()}
+        vectors = {key: _tfidf(c, idf) for key, c in counts.items()}
+        delivered = [(call_id, _tfidf(c, idf)) for call_id, c in self._delivered]
+
+        merged = list(results)
+        for i in sorted(mergeable, key=lambda i: MERGE_TOOLS.index(calls[i][0])):
+            query = _tfidf(_terms(str(calls[i][1].get("query", ""))), idf)
+            ranked = sorted(
+                range(len(results[i])),
+                key=lambda j: -cosine(query, vectors[(i, j)]) if (i, j) in vectors else 0.0,
+            )
+            # (record, canonical key, vector) of the records this call keeps
+            kept = []
+            stubs = []
+            for j in ranked:
+                record = results[i][j]
+                vector = vectors.get((i, j))
+                if vector is None:
+                    kept.append((record, None, None))
+                    continue
+                key = canonical_url(record["url"]) if record.get("url") else None
+
+                owner = self._keys.get(key) if key else None
+                if owner is None:
+                    owner = next((cid for cid, v in delivered if cosine(vector, v) >= self.threshold), None)
+                if owner is not None:
+                    self.collapsed += 1
+                    stubs.append({"title": record.get("title"), "url": record.get("url"), "duplicate_of": owner})
+                    continue
+
+                twin = next(
+                    (
+                        r for r, k, v in kept
+                        if v is not None and ((key and k == key) or cosine(vector, v) >= self.threshold)
+                    ),
+                    None,
+                )
+                if twin is not None:
+                    self.collapsed += 1
+                    if record.get("url"):
+                        twin.setdefault("also_at", []).append(record["url"])
+                    continue
+                kept.append((dict(record), key, vector))
+
+            for record, key, vector in kept:
+                if vector is None:
+                    continue
+                if key:
+                    self._keys[key] = call_ids[i]
+                delivered.append((call_ids[i], vector))
+                self._delivered.append((call_ids[i], _terms(_record_text(record))))
+            merged[i] = [record for record, _, _ in kept] + stubs
+        return merged
@@ -0,0 +1,141 @@
+# ================================
+# Standard library imports
+# ================================
+import contextlib
+import contextvars
+import os
+import time
+
+# ================================
+# Local / project imports
+# ================================
+import tracing
+
+# Result given to the model for tool calls beyond max_tool_calls
+TOOL_BUDGET_EXCEEDED = [{"error": "Tool call budget exhausted; write the report with the sources already found."}]
+
+# time.monotonic() by which the tool call running in this context must finish;
+# set by the tool executors, honoured by http_transport's retries and timeouts
+CALL_DEADLINE = contextvars.ContextVar("call_deadline", default=None)
+
+
+@contextlib.contextmanager
+def call_deadline(seconds: float):
+    """
+    Limits the calls made inside the block to `seconds` from now (or to an
+    enclosing, earlier deadline).
+    """
+    deadline = time.monotonic() + seconds
+    enclosing = CALL_DEADLINE.get()
+    token = CALL_DEADLINE.set(deadline if enclosing is None else min(deadline, enclosing))
+    try:
+        yield
+    finally:
+        CALL_DEADLINE.reset(token)
+
+
+class RunBudget:
+    """
+    Wall-clock, tool-call and token budget of one research run.
+
+    The agent loop charges every model response and tool call to the budget.
+    Tool timeouts are cut so that a slow tool can never eat the time reserved
+    for the final answer, and once any limit is (nearly) reached the loop asks
+    for the final report with tool_choice="none". A limit of None is unbounded.
+
+    Args:
+        deadline (float | None): Seconds the whole run may take.
+        max_tool_calls (int | None): Tool calls allowed across all turns.
+        max_tokens (int | None): Prompt + completion tokens allowed across all turns.
+        final_reserve (float): Seconds kept back for the final synthesis turn.
+        token_reserve (int): Tokens kept back for the final synthesis turn.
+    """
+
+    def __init__(
+        self,
+        deadline: float | None = 300.0,
+        max_tool_calls: int | None = 30,
+        max_tokens: int | None = None,
+        final_reserve: float = 30.0,
+        token_reserve: int = 8000,
+    ):
+        self.deadline = deadline
+        self.max_tool_calls = max_tool_calls
+        self.max_tokens = max_tokens
+        self.final_reserve = final_reserve
+        self.token_reserve = token_reserve
+        self.started = time.monotonic()
+        self.tool_calls = 0
+        self.tokens = 0
+
+    @classmethod
+    def from_env(cls) -> "RunBudget":
+        """
+        Budget from RUN_DEADLINE, RUN_MAX_TOOL_CALLS and RUN_MAX_TOKENS
+        ("none" disables a limit), falling back to the defaults.
+        """
+        def read(name, cast, default):
+            value = os.getenv(name)
+            if value is None:
+                return default
+            return None if value.lower() == "none" else cast(value)
+
+        return cls(
+            deadline=read("RUN_DEADLINE", float, 300.0),
+            max_tool_calls=read("RUN_MAX_TOOL_CALLS", int, 30),
+            max_tokens=read("RUN_MAX_TOKENS", int, None),
+        )
+
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started
+
+    def remaining_time(self) -> float | None:
+        if self.deadline is None:
+            return None
+        return self.deadline - self.elapsed()
+
+    def charge(self, response):
+        """
+        Adds a chat completion's token usage to the budget.
+        """
+        usage = getattr(response, "usage", None)
+        self.tokens += getattr(usage, "total_tokens", None) or 0
+
+    def take_tool_calls(self, requested: int) -> int:
+        """
+        Reserves up to `requested` tool calls and returns how many may run.
+        """
+        allowed = requested
+        if self.max_tool_calls is not None:
+            allowed = max(0, min(requested, self.max_tool_calls - self.tool_calls))
+        self.tool_calls += allowed
+        return allowed
+
+    def tool_timeout(self, default: float) -> float:
+        """
+        Per-call tool timeout: `default`, shortened so tools finish before the
+        time reserved for the final answer (but never below one second).
+        """
+        remaining = self.remaining_time()
+        if remaining is None:
+            return default
+        return max(1.0, min(default, remaining - self.final_reserve))
+
+    def exhausted_reason(self) -> str | None:
+        """
+        Why the run should stop calling tools and write its answer now, if it should.
+        """
+        remaining = self.remaining_time()
+        if remaining is not None and remaining <= self.final_reserve:
+            return "deadline"
+        if self.max_tool_calls is not None and self.tool_calls >= self.max_tool_calls:
+            return "tool_calls"
+        if self.max_tokens is not None and self.tokens >= self.max_tokens - self.token_reserve:
+            return "tokens"
+        return None
+
+    def should_finalize(self) -> bool:
+        reason = self.exhausted_reason()
+        if reason is not None:
+            tracing.annotate(budget_stop=reason)
+        return reason is not None
@@ -0,0 +1,81 @@
+import asyncio
+import threading
+import time
+
+from llm_scheduler import LLMScheduler
+
+
+def _drained_scheduler() -> LLMScheduler:
+    # 600 tokens per minute = 10 tokens/s; the first request empties the bucket
+    scheduler = LLMScheduler(rpm=1000, tpm=600, poll=0.01)
+    scheduler.acquire(600)
+    return scheduler
+
+
+def _wait_for_depth(scheduler: LLMScheduler, depth: int, timeout: float = 2.0):
+    deadline = time.monotonic() + timeout
+    while scheduler.queue_depth() != depth:
+        assert time.monotonic() < deadline, f"queue depth stuck at {scheduler.queue_depth()}"
+        time.sleep(0.005)
+
+
+def test_waiters_are_admitted_in_priority_order():
+    scheduler = _drained_scheduler()
+    admitted = []
+
+    def worker(name, prio):
+        scheduler.acquire(2, prio)
+        admitted.append(name)
+
+    threads = []
+    for depth, (name, prio) in enumerate([("planning-1", 10), ("planning-2", 10), ("synthesis", 0)], start=1):
+        thread = threading.Thread(target=worker, args=(name, prio))
+        thread.start()
+        threads.append(thread)
+        _wait_for_depth(scheduler, depth)
+
+    for thread in threads:
+        thread.join(timeout=5)
+
+    assert admitted == ["synthesis", "planning-1", "planning-2"]
+    assert scheduler.queue_depth() == 0
+
+
+def test_cancelled_waiter_does_not_block_the_queue():
+    scheduler = _drained_scheduler()
+
+    async def scenario():
+        head = asyncio.create_task(scheduler.async_acquire(5, prio=0))
+        await asyncio.sleep(0.05)
+        assert scheduler.queue_depth() == 1
+        head.cancel()
+        await asyncio.gather(head, return_exceptions=True)
+        assert scheduler.queue_depth() == 0
+
+        started = time.monotonic()
+        await asyncio.wait_for(scheduler.async_acquire(5), timeout=3)
+        return time.monotonic() - started
+
+    waited = asyncio.run(scenario())
+    assert waited < 1.5
+    assert scheduler.queue_depth() == 0
+
+
+def test_failed_sync_waiter_is_removed():
+    scheduler = _drained_scheduler()
+    original_wait = scheduler._cond.wait
+
+    def failing_wait(timeout=None):
+        raise RuntimeError("interrupted")
+
+    scheduler._cond.wait = failing_wait
+    try:
+        scheduler.acquire(5)
+    except RuntimeError:
+        pass
+    finally:
+        scheduler._cond.wait = original_wait
+
+    assert scheduler.queue_depth() == 0
+    scheduler.acquire(5)
+    assert scheduler.queue_depth() == 0
@@ -0,0 +1,26 @@
+from types import SimpleNamespace
+
+from model_routing import ModelRouter
+
+ROUTER = ModelRouter("fast", synthesis="strong")
+TOOLS = {"arxiv_search_tool": None}
+
+
+def _msg(*calls):
+    return SimpleNamespace(
+        tool_calls=[SimpleNamespace(function=SimpleNamespace(name=name, arguments=args)) for name, args in calls] or None
+    )
+
+
+def test_drafted_answer_is_redone_as_the_final_answer():
+    assert ROUTER.escalation(_msg(), "fast", TOOLS) == ("strong", "none")
+
+
+def test_malformed_tool_calls_are_redone_with_tools():
+    assert ROUTER.escalation(_msg(("unknown_tool", "{}")), "fast", TOOLS) == ("strong", "auto")
+    assert ROUTER.escalation(_msg(("arxiv_search_tool", "[1]")), "fast", TOOLS) == ("strong", "auto")
+
+
+def test_usable_turns_and_synthesis_answers_are_kept():
+    assert ROUTER.escalation(_msg(("arxiv_search_tool", '{"query": "novae"}')), "fast", TOOLS) is None
+    assert ROUTER.escalation(_msg(), "strong", TOOLS) is None
@@ -0,0 +1,52 @@
+import time
+
+from pdf_text import CHUNK_CHARS, PdfStore, _chunks, select_sections
+from run_budget import CALL_DEADLINE, call_deadline
+
+
+def _page(number):
+    # pypdf-style text: one line per layout line, no blank lines between paragraphs
+    lines = [f"Line {i} of page {number} discusses radio emission from recurrent novae." for i in range(60)]
+    return "\n".join(lines)
+
+
+def test_single_newline_pages_are_chunked_and_selected():
+    pages = [_page(n) for n in range(1, 11)]
+    assert all(len(text) <= CHUNK_CHARS for _, text in _chunks(pages))
+
+    text, truncated = select_sections(pages, "radio emission", 12000 // 5)
+    assert text.startswith("[p. 1] Line 0 of page 1")
+    assert 0 < len(text) <= 12000 // 5 + 100
+    assert truncated
+
+
+def test_oversized_first_chunk_is_trimmed_not_dropped():
+    pages = ["word " * 2000]
+    text, truncated = select_sections(pages, "word", 500)
+    assert text.startswith("[p. 1] word")
+    assert len(text) <= 510
+    assert truncated
+
+
+class _SlowSession:
+    def __init__(self):
+        self.deadlines = []
+
+    def get(self, url, timeout=None, stream=False):
+        self.deadlines.append(CALL_DEADLINE.get())
+        time.sleep(0.5)
+        raise ConnectionError("offline")
+
+
+def test_fetch_pages_keeps_the_call_deadline(tmp_path):
+    store = PdfStore(str(tmp_path), max_processes=1)
+    session = _SlowSession()
+    try:
+        with call_deadline(0.1):
+            started = time.monotonic()
+            [result] = store.fetch_pages(["https://example.com/a.pdf"], session)
+            assert time.monotonic() - started < 0.4
+    finally:
+        store.shutdown()
+    assert isinstance(result, TimeoutError)
+    assert session.deadlines[0] is not None
@@ -0,0 +1,31 @@
+from paper_index import PaperIndex
+from records import HitBatch, PaperBatch, PaperRecord
+
+
+def _paper(i):
+    return {
+        "title": f"Recurrent nova {i}",
+        "authors": ["A. Author", "B. Author"],
+        "published": "2024-01-01",
+        "url": f"http://arxiv.org/abs/2401.{i:05d}",
+        "summary": "Radio observations of a recurrent nova.",
+        "link_pdf": None,
+    }
+
+
+def test_batches_support_slices():
+    papers = [_paper(i) for i in range(5)]
+    batch = PaperBatch(papers)
+    assert batch[1:3] == papers[1:3]
+    assert batch[::-2] == papers[::-2]
+    assert batch[-1] == papers[-1]
+
+    hits = [{"title": p["title"], "content": p["summary"], "url": p["url"]} for p in papers]
+    assert HitBatch(hits)[3:] == hits[3:]
+
+
+def test_harvest_indexes_paper_records(tmp_path):
+    index = PaperIndex(str(tmp_path / "index.sqlite3"))
+    records = [PaperRecord.from_dict(_paper(i)) for i in range(7)] + [{"error": "timed out"}]
+    assert index.harvest(records, batch_size=3) == 7
+    assert index.search("recurrent nova", max_results=10)[0]["authors"] == ["A. Author", "B. Author"]
@@ -0,0 +1,33 @@
+from html.parser import HTMLParser
+
+from report_renderer import render_report_html
+
+
+class _Attributes(HTMLParser):
+    def __init__(self):
+        super().__init__()
+        self.attrs = []
+
+    def handle_starttag(self, tag, attrs):
+        self.attrs.extend(name for name, _ in attrs)
+
+
+def _attribute_names(html: str) -> list:
+    parser = _Attributes()
+    parser.feed(html)
+    return parser.attrs
+
+
+def test_quote_in_url_cannot_add_attributes():
+    for report in (
+        '# Report\n\nSee [x](https://a"onmouseover="alert(1)) now.',
+        '# Report\n\nSee [x](https://example.com/a"onmouseover="alert(1)) now.',
+        '# Report\n\nSee https://example.com/a"onmouseover="alert(1) now.',
+    ):
+        assert "onmouseover" not in _attribute_names(render_report_html(report))
+
+
+def test_link_attributes_are_escaped_once():
+    html = render_report_html("# Report\n\nSee [paper](https://example.com/?a=1&b='2') and https://example.com/x?y=1&z=2")
+    assert 'href="https://example.com/?a=1&amp;b=&#x27;2&#x27;"' in html
+    assert 'href="https://example.com/x?y=1&amp;z=2"' in html
@@ -0,0 +1,45 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("httpx")
+pytest.importorskip("requests")
+
+from model_routing import ModelRouter  # noqa: E402
+from research_agent.run import ResearchRun  # noqa: E402
+from run_budget import RunBudget  # noqa: E402
+
+
+def _response(content=None, *calls):
+    tool_calls = [
+        SimpleNamespace(id=f"call_{i}", function=SimpleNamespace(name=name, arguments=json.dumps(args)))
+        for i, (name, args) in enumerate(calls)
+    ]
+    message = SimpleNamespace(content=content, tool_calls=tool_calls or None)
+    return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=None)
+
+
+def _run():
+    return ResearchRun("novae", ModelRouter("fast", synthesis="strong"), RunBudget(), {"arxiv_search_tool": None})
+
+
+def test_drafted_answer_escalates_to_a_final_turn_without_tools():
+    run = _run()
+    assert run.turn_request(0)["model"] == "fast"
+    retry = run.review(_response("draft"))
+    assert (retry["model"], retry["tool_choice"]) == ("strong", "none")
+
+    # Even if the synthesis model still calls a tool, its answer ends the run
+    assert run.review(_response("report", ("arxiv_search_tool", {"query": "novae"}))) is None
+    assert run.accept(_response("report", ("arxiv_search_tool", {"query": "novae"}))) is None
+    assert run.final_text == "report"
+
+
+def test_malformed_calls_escalate_with_tools():
+    run = _run()
+    run.turn_request(0)
+    retry = run.review(_response(None, ("unknown_tool", {})))
+    assert (retry["model"], retry["tool_choice"]) == ("strong", "auto")
+    calls, call_ids = run.accept(_response(None, ("arxiv_search_tool", {"query": "novae"})))
+    assert calls == [("arxiv_search_tool", {"query": "novae"})]
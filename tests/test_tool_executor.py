@@ -0,0 +1,33 @@
+import asyncio
+import time
+
+from run_budget import CALL_DEADLINE, call_deadline
+from tool_executor import AsyncToolExecutor, ToolExecutor
+
+
+def _time_left():
+    return CALL_DEADLINE.get() - time.monotonic()
+
+
+async def _async_time_left():
+    return _time_left()
+
+
+def test_tool_calls_run_under_the_executor_timeout():
+    executor = ToolExecutor({"probe": _time_left}, max_workers=2)
+    try:
+        [left] = executor.run([("probe", {})], timeout=5)
+    finally:
+        executor.shutdown()
+    assert 0 < left <= 5
+
+    executor = AsyncToolExecutor({"probe": _async_time_left, "sync_probe": _time_left})
+    lefts = asyncio.run(executor.run([("probe", {}), ("sync_probe", {})], timeout=5))
+    assert all(0 < left <= 5 for left in lefts)
+    assert CALL_DEADLINE.get() is None
+
+
+def test_nested_call_deadline_keeps_the_earlier_one():
+    with call_deadline(1):
+        with call_deadline(60):
+            assert _time_left() <= 1
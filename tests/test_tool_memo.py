@@ -0,0 +1,38 @@
+from tool_memo import ToolCallMemo, requested_results
+
+
+def test_string_max_results_is_coerced():
+    assert requested_results({"query": "novae", "max_results": "5"}) == 5
+    assert requested_results({"query": "novae", "max_results": "many"}) == 5
+
+
+def test_repeated_call_with_string_max_results_is_answered_from_the_memo():
+    memo = ToolCallMemo()
+    papers = [{"title": f"Paper {i}", "url": f"http://arxiv.org/abs/{i}"} for i in range(5)]
+    memo.run([("arxiv_search_tool", {"query": "novae", "max_results": 5})], ["c1"], lambda calls: [papers])
+
+    [reference] = memo.run(
+        [("arxiv_search_tool", {"query": "Novae", "max_results": "3"})], ["c2"], lambda calls: [[{"error": "ran"}]]
+    )
+    assert reference["duplicate_of"] == "c1"
+    assert len(reference["results"]) == 3
+
+
+def test_only_search_tools_are_memoized():
+    memo = ToolCallMemo()
+    calls = [
+        ("full_result_tool", {"result_id": "arxiv_search_tool:1"}),
+        ("pdf_text_tool", {"urls": ["2101.00001"], "query": "novae"}),
+    ]
+    ran = []
+
+    def execute(batch):
+        ran.extend(batch)
+        return [[{"url": "u", "text": f"passage {len(ran)}"}] for _ in batch]
+
+    memo.run(calls, ["c1", "c2"], execute)
+    results = memo.run(calls + calls, ["c3", "c4", "c5", "c6"], execute)
+
+    assert len(ran) == 6
+    assert all("duplicate_of" not in result for result in results)
+    assert memo.hits == 0
@@ -0,0 +1,44 @@
+import contextvars
+
+from tool_projection import ToolResultProjector, estimate_tokens, full_result_tool
+
+
+def _papers(n):
+    return [
+        {
+            "title": f"Paper {i}",
+            "authors": ["A", "B", "C", "D"],
+            "published": "2024-01-01",
+            "url": f"http://arxiv.org/abs/2401.{i:05d}",
+            "summary": "word " * 300,
+            "link_pdf": None,
+        }
+        for i in range(n)
+    ]
+
+
+def test_partial_results_are_projected_and_keep_their_errors():
+    error = {"error": "503 Service Unavailable"}
+    result = _papers(100) + [error]
+    projected = ToolResultProjector().project("arxiv_fetch_tool", result)
+
+    assert isinstance(projected, dict)
+    assert error in projected["results"]
+    assert estimate_tokens(projected) < estimate_tokens(result) / 5
+
+
+def test_all_error_results_pass_through():
+    result = [{"error": "timed out"}]
+    assert ToolResultProjector().project("arxiv_search_tool", result) is result
+
+
+def test_full_result_tool_returns_untrimmed_records_of_this_run():
+    def run():
+        result = _papers(10)
+        projected = ToolResultProjector().project("arxiv_search_tool", result)
+        assert projected["truncated"]
+        return full_result_tool(projected["result_id"], start="2", count=2), result
+
+    records, result = contextvars.copy_context().run(run)
+    assert records == result[2:4]
+    assert "error" in contextvars.copy_context().run(full_result_tool, "arxiv_search_tool:99")[0]
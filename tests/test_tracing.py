@@ -0,0 +1,38 @@
+import json
+import time
+
+import tracing
+
+
+@tracing.traced("html")
+def _streamed_stage():
+    def chunks():
+        for chunk in ("<p>", "report", "</p>"):
+            time.sleep(0.05)
+            yield chunk
+
+    return tracing.until_consumed(chunks())
+
+
+def _spans(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f]
+
+
+def test_streamed_span_ends_when_the_stream_is_read(tmp_path, monkeypatch):
+    path = tmp_path / "trace.jsonl"
+    monkeypatch.setattr(tracing.TRACER, "path", str(path))
+
+    stream = _streamed_stage()
+    assert not path.exists()
+    assert "".join(stream) == "<p>report</p>"
+
+    [span] = _spans(path)
+    assert span["name"] == "html"
+    assert span["duration_s"] >= 0.15
+    assert "error" not in span
+
+
+def test_until_consumed_outside_a_span_returns_the_iterable():
+    chunks = iter(["a"])
+    assert tracing.until_consumed(chunks) is chunks
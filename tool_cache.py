@@ -0,0 +1,162 @@
+# ================================
+# Standard library imports
+# ================================
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+DEFAULT_CACHE_PATH = "tool_cache.sqlite3"
+
+
+def normalize_query(query: str) -> str:
+    """
+    Case-folds the query and collapses whitespace so trivially different
+    spellings of the same search share a cache entry.
+    """
+    return " ".join(str(query).casefold().split())
+
+
+def is_error_result(result) -> bool:
+    """
+    True for the {"error": ...} / [{"error": ...}] shapes the tools return on failure.
+    """
+    if isinstance(result, dict):
+        return "error" in result
+    if isinstance(result, list):
+        return any(isinstance(item, dict) and "error" in item for item in result)
+    return False
+
+
+def is_failed_result(result) -> bool:
+    """
+    True when a result holds nothing but errors. Unlike is_error_result, a
+    partial result (good records plus an {"error": ...} record for a failed
+    chunk) does not count.
+    """
+    if isinstance(result, dict):
+        return "error" in result
+    if isinstance(result, list):
+        return bool(result) and all(isinstance(item, dict) and "error" in item for item in result)
+    return False
+
+
+class ToolCache:
+    """
+    On-disk (SQLite) cache for search tool results.
+
+    Entries are keyed on (tool name, normalized query, max_results), expire after
+    `ttl` seconds and are evicted least-recently-used once the table holds more
+    than `max_entries` rows. SQLite runs in WAL mode with a busy timeout, and
+    every thread (and process) gets its own connection, so one cache file can be
+    shared by several workers.
+    """
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH, ttl: float = 24 * 3600, max_entries: int = 10_000):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._stats_lock = threading.Lock()
+        self._local = threading.local()
+
+        with self._connect() as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS tool_cache (
+                    key TEXT PRIMARY KEY,
+                    tool TEXT NOT NULL,
+                    value TEXT NOT NULL,
+                    created REAL NOT NULL,
+                    accessed REAL NOT NULL
+                )
+                """
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS tool_cache_accessed ON tool_cache (accessed)")
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        # A connection inherited across fork() must not be reused by the child.
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    @staticmethod
+    def make_key(tool_name: str, query: str, max_results: int) -> str:
+        raw = json.dumps([tool_name, normalize_query(query), int(max_results)])
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _count(self, hit: bool):
+        with self._stats_lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def get(self, tool_name: str, query: str, max_results: int):
+        """
+        Returns the cached result, or None on a miss or an expired entry.
+        """
+        key = self.make_key(tool_name, query, max_results)
+        now = time.time()
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT value, created FROM tool_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or now - row[1] > self.ttl:
+                if row is not None:
+                    conn.execute("DELETE FROM tool_cache WHERE key = ?", (key,))
+                self._count(hit=False)
+                return None
+            conn.execute("UPDATE tool_cache SET accessed = ? WHERE key = ?", (now, key))
+
+        self._count(hit=True)
+        return json.loads(row[0])
+
+    def set(self, tool_name: str, query: str, max_results: int, result) -> bool:
+        """
+        Stores a result. Error results are never cached.
+
+        Returns:
+            bool: True if the result was stored.
+        """
+        if is_error_result(result):
+            return False
+
+        key = self.make_key(tool_name, query, max_results)
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO tool_cache (key, tool, value, created, accessed) VALUES (?, ?, ?, ?, ?)",
+                (key, tool_name, json.dumps(result), now, now),
+            )
+            (count,) = conn.execute("SELECT COUNT(*) FROM tool_cache").fetchone()
+            if count > self.max_entries:
+                conn.execute(
+                    "DELETE FROM tool_cache WHERE key IN "
+                    "(SELECT key FROM tool_cache ORDER BY accessed ASC LIMIT ?)",
+                    (count - self.max_entries,),
+                )
+        return True
+
+    def purge_expired(self) -> int:
+        with self._connect() as conn:
+            cursor = conn.execute("DELETE FROM tool_cache WHERE created < ?", (time.time() - self.ttl,))
+            return cursor.rowcount
+
+    def clear(self):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM tool_cache")
+
+    def stats(self) -> dict:
+        with self._connect() as conn:
+            (entries,) = conn.execute("SELECT COUNT(*) FROM tool_cache").fetchone()
+        with self._stats_lock:
+            return {"hits": self.hits, "misses": self.misses, "entries": entries}
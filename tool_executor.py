@@ -0,0 +1,175 @@
+# ================================
+# Standard library imports
+# ================================
+import asyncio
+import contextvars
+import inspect
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+# ================================
+# Local / project imports
+# ================================
+import tracing
+from run_budget import call_deadline
+
+# Default number of simultaneous calls allowed per tool. arXiv asks clients to
+# keep traffic low, so it gets a single slot; DuckDuckGo tolerates a few more.
+DEFAULT_TOOL_LIMITS = {
+    "arxiv_search_tool": 1,
+    "arxiv_fetch_tool": 1,
+    "web_search_tool": 4,
+    "pdf_text_tool": 2,
+}
+
+
+class ToolExecutor:
+    """
+    Runs the tool calls of one assistant turn concurrently.
+
+    Calls share a bounded thread pool, each tool name is additionally capped by
+    its own semaphore, and every call gets a timeout. Results come back in the
+    same order as the calls that produced them.
+    """
+
+    def __init__(
+        self,
+        tool_mapping: dict,
+        max_workers: int = 8,
+        tool_limits: dict | None = None,
+        default_limit: int = 4,
+        timeout: float = 60.0,
+    ):
+        self.tool_mapping = tool_mapping
+        self.timeout = timeout
+        self.default_limit = default_limit
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="tool")
+        self._limits = dict(DEFAULT_TOOL_LIMITS)
+        self._limits.update(tool_limits or {})
+        self._semaphores = {}
+        self._lock = threading.Lock()
+
+    def _semaphore(self, tool_name: str) -> threading.BoundedSemaphore:
+        with self._lock:
+            if tool_name not in self._semaphores:
+                limit = self._limits.get(tool_name, self.default_limit)
+                self._semaphores[tool_name] = threading.BoundedSemaphore(limit)
+            return self._semaphores[tool_name]
+
+    def _run_one(self, tool_name: str, args: dict, deadline: float):
+        semaphore = self._semaphore(tool_name)
+        # Waiting for a slot counts against the call's timeout as well.
+        if not semaphore.acquire(timeout=max(0.0, deadline - time.monotonic())):
+            return {"error": f"{tool_name} timed out waiting for a free slot"}
+        try:
+            tool_func = self.tool_mapping[tool_name]
+            # HTTP retries inside the tool stop at the same deadline
+            with tracing.span("tool", tool=tool_name) as span, call_deadline(deadline - time.monotonic()):
+                result = tool_func(**args)
+                span.set(result_chars=tracing.payload_size(result))
+            return result
+        except Exception as e:
+            return {"error": str(e)}
+        finally:
+            semaphore.release()
+
+    def run(self, calls: list[tuple[str, dict]], timeout: float | None = None) -> list:
+        """
+        Executes (tool_name, args) pairs concurrently.
+
+        Args:
+            calls (list[tuple[str, dict]]): Tool names and their parsed arguments.
+            timeout (float): Per-call timeout in seconds (defaults to self.timeout).
+
+        Returns:
+            list: One result per call, in the original order. Failed or timed-out
+            calls yield {"error": ...} like the sequential loop did.
+        """
+        timeout = self.timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+        # Each worker runs in a copy of the caller's context so tool spans nest
+        # under the current trace.
+        futures = [
+            self._pool.submit(contextvars.copy_context().run, self._run_one, tool_name, args, deadline)
+            for tool_name, args in calls
+        ]
+
+        results = []
+        for (tool_name, _), future in zip(calls, futures):
+            try:
+                results.append(future.result(timeout=max(0.0, deadline - time.monotonic())))
+            except FutureTimeoutError:
+                # The worker keeps running in the background; its result is dropped.
+                results.append({"error": f"{tool_name} timed out after {timeout}s"})
+        return results
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+class AsyncToolExecutor:
+    """
+    asyncio counterpart of ToolExecutor.
+
+    Coroutine tools are awaited directly; plain functions are pushed to the
+    loop's default executor. Per-tool limits and timeouts behave the same way.
+    """
+
+    def __init__(
+        self,
+        tool_mapping: dict,
+        tool_limits: dict | None = None,
+        default_limit: int = 4,
+        timeout: float = 60.0,
+    ):
+        self.tool_mapping = tool_mapping
+        self.timeout = timeout
+        self.default_limit = default_limit
+        self._limits = dict(DEFAULT_TOOL_LIMITS)
+        self._limits.update(tool_limits or {})
+        self._semaphores = {}
+        self._loop = None
+
+    def _semaphore(self, tool_name: str) -> asyncio.Semaphore:
+        # asyncio primitives belong to one event loop; start fresh on a new one.
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self._loop = loop
+            self._semaphores = {}
+        if tool_name not in self._semaphores:
+            limit = self._limits.get(tool_name, self.default_limit)
+            self._semaphores[tool_name] = asyncio.Semaphore(limit)
+        return self._semaphores[tool_name]
+
+    async def _call(self, tool_name: str, args: dict):
+        async with self._semaphore(tool_name):
+            tool_func = self.tool_mapping[tool_name]
+            with tracing.span("tool", tool=tool_name) as span:
+                if inspect.iscoroutinefunction(tool_func):
+                    result = await tool_func(**args)
+                else:
+                    result = await asyncio.to_thread(tool_func, **args)
+                span.set(result_chars=tracing.payload_size(result))
+            return result
+
+    async def _run_one(self, tool_name: str, args: dict, timeout: float):
+        try:
+            # wait_for runs _call in a task that copies this context, deadline included
+            with call_deadline(timeout):
+                return await asyncio.wait_for(self._call(tool_name, args), timeout)
+        except asyncio.TimeoutError:
+            return {"error": f"{tool_name} timed out after {timeout}s"}
+        except Exception as e:
+            return {"error": str(e)}
+
+    async def run(self, calls: list[tuple[str, dict]], timeout: float | None = None) -> list:
+        """
+        Executes (tool_name, args) pairs concurrently and returns their results
+        in the original order.
+        """
+        timeout = self.timeout if timeout is None else timeout
+        return await asyncio.gather(
+            *(self._run_one(tool_name, args, timeout) for tool_name, args in calls)
+        )
@@ -0,0 +1,154 @@
+# ================================
+# Standard library imports
+# ================================
+import json
+
+# ================================
+# Local / project imports
+# ================================
+from tool_cache import is_failed_result, normalize_query
+
+# Default of max_results in every search tool
+DEFAULT_MAX_RESULTS = 5
+
+# Tools whose repeated calls are answered from the memo. Other tools (PDF
+# passages, full_result_tool pages) always run: a titles-and-URLs reference
+# would drop exactly what they return.
+MEMO_TOOLS = ("arxiv_search_tool", "arxiv_fetch_tool", "local_paper_search_tool", "web_search_tool")
+
+
+def call_key(tool_name: str, args: dict) -> str:
+    """
+    Normalized identity of a tool call, ignoring max_results and trivial
+    differences in casing and whitespace of string arguments.
+    """
+    normalized = {
+        k: normalize_query(v) if isinstance(v, str) else v
+        for k, v in args.items()
+        if k != "max_results"
+    }
+    return json.dumps([tool_name, normalized], sort_keys=True, default=str)
+
+
+def requested_results(args: dict) -> int:
+    """
+    Number of results a call asks for: max_results, or one per id/URL for bulk tools.
+    Models sometimes send max_results as a string ("5"); unusable values fall
+    back to the default.
+    """
+    if "max_results" in args:
+        try:
+            return int(args["max_results"])
+        except (TypeError, ValueError):
+            return DEFAULT_MAX_RESULTS
+    for field in ("ids", "urls"):
+        if isinstance(args.get(field), list):
+            return len(args[field])
+    return DEFAULT_MAX_RESULTS
+
+
+def _reference(call_id: str, results: list) -> dict:
+    return {
+        "duplicate_of": call_id,
+        "note": (
+            f"Same search as tool call {call_id}, whose result appears earlier in this conversation. "
+            "That copy may have been shortened; pass its result_id to full_result_tool for the full records."
+        ),
+        "results": [
+            {"title": r.get("title"), "url": r.get("url")}
+            for r in results
+            if isinstance(r, dict)
+        ],
+    }
+
+
+class ToolCallMemo:
+    """
+    Per-conversation memo of search tool calls.
+
+    A call that repeats an earlier (tool, normalized args) pair is not sent to
+    the network again. It is answered from the earlier result, sliced when it
+    asks for fewer results, and goes back to the model as a short reference
+    (titles and URLs only) instead of a second copy of the payload. Duplicates
+    inside one turn are collapsed so only the largest request runs. Only
+    MEMO_TOOLS are memoized; calls to other tools pass straight through.
+    """
+
+    def __init__(self):
+        # key -> (max_results, result, tool_call_id)
+        self._entries = {}
+        self.hits = 0
+
+    def _lookup(self, key: str, max_results: int):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        cached_max, result, call_id = entry
+        # A short result means the source ran out, so it also covers larger requests
+        if cached_max >= max_results or len(result) < cached_max:
+            return call_id, result[:max_results]
+        return None
+
+    def plan(self, calls: list[tuple[str, dict]], call_ids: list[str]):
+        """
+        Splits a turn's calls into the ones that must run and a resolver that
+        assembles the final, in-order results once those have run.
+
+        Returns:
+            (to_run, resolve): to_run is a list of (tool_name, args); resolve(results)
+            takes their results (same order) and returns one result per original call.
+        """
+        keys = [call_key(tool_name, args) if tool_name in MEMO_TOOLS else None for tool_name, args in calls]
+        sizes = [requested_results(args) for _, args in calls]
+
+        # Pick, per uncached key, the call asking for the most results
+        leaders = {}
+        passthrough = []
+        for i, key in enumerate(keys):
+            if key is None:
+                passthrough.append(i)
+                continue
+            if self._lookup(key, sizes[i]) is not None:
+                continue
+            if key not in leaders or sizes[i] > sizes[leaders[key]]:
+                leaders[key] = i
+
+        run_indexes = sorted([*leaders.values(), *passthrough])
+        to_run = [calls[i] for i in run_indexes]
+
+        def resolve(results: list) -> list:
+            executed = dict(zip(run_indexes, results))
+            for i, result in executed.items():
+                if keys[i] is not None and not is_failed_result(result) and isinstance(result, list):
+                    self._entries[keys[i]] = (sizes[i], result, call_ids[i])
+
+            final = []
+            for i, key in enumerate(keys):
+                if i in executed:
+                    final.append(executed[i])
+                    continue
+                cached = self._lookup(key, sizes[i])
+                if cached is None:
+                    # The leader failed; report its error for this call too
+                    final.append(executed[leaders[key]])
+                    continue
+                self.hits += 1
+                final.append(_reference(*cached))
+            return final
+
+        return to_run, resolve
+
+    def run(self, calls: list[tuple[str, dict]], call_ids: list[str], execute) -> list:
+        """
+        Runs a turn's calls through `execute` (e.g. ToolExecutor.run), skipping
+        the ones the memo can answer.
+        """
+        to_run, resolve = self.plan(calls, call_ids)
+        return resolve(execute(to_run) if to_run else [])
+
+    async def async_run(self, calls: list[tuple[str, dict]], call_ids: list[str], execute) -> list:
+        """
+        Async counterpart of run() for AsyncToolExecutor.run.
+        """
+        to_run, resolve = self.plan(calls, call_ids)
+        return resolve(await execute(to_run) if to_run else [])
@@ -0,0 +1,215 @@
+# ================================
+# Standard library imports
+# ================================
+import contextvars
+import itertools
+import json
+import math
+
+# ================================
+# Local / project imports
+# ================================
+from tool_cache import is_failed_result
+
+# Rough characters-per-token ratio for English prose; good enough for budgeting.
+CHARS_PER_TOKEN = 4
+
+# Fields the model actually needs from each tool, and which of them are free
+# text that may be trimmed. Title and URL are never trimmed so citations survive.
+PROJECTIONS = {
+    "arxiv_search_tool": {
+        "fields": ("title", "authors", "published", "url", "summary", "also_at", "duplicate_of"),
+        "text_fields": ("summary",),
+    },
+    "arxiv_fetch_tool": {
+        "fields": ("title", "authors", "published", "url", "summary", "also_at", "duplicate_of"),
+        "text_fields": ("summary",),
+    },
+    "local_paper_search_tool": {
+        "fields": ("title", "authors", "published", "url", "summary", "also_at", "duplicate_of"),
+        "text_fields": ("summary",),
+    },
+    "web_search_tool": {
+        "fields": ("title", "url", "content", "also_at", "duplicate_of"),
+        "text_fields": ("content",),
+    },
+    # Full-text passages are the point of this tool, so it gets a larger allowance
+    "pdf_text_tool": {
+        "fields": ("url", "text"),
+        "text_fields": ("text",),
+        "result_tokens": 4000,
+        "text_tokens": 2000,
+    },
+}
+
+MAX_AUTHORS = 3
+
+# Most records full_result_tool returns per call
+MAX_FULL_RECORDS = 5
+
+# Projector of the research run executing in this context (see full_result_tool)
+_current_projector = contextvars.ContextVar("tool_projector", default=None)
+
+
+def estimate_tokens(value) -> int:
+    """
+    Estimates the token count of a string (or of any JSON-serializable value).
+    """
+    text = value if isinstance(value, str) else json.dumps(value)
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def _trim(text: str, max_chars: int) -> str:
+    if len(text) <= max_chars:
+        return text
+    cut = text[:max_chars].rsplit(" ", 1)[0]
+    return cut + " …"
+
+
+class ToolResultProjector:
+    """
+    Shrinks tool results before they are added to the message history.
+
+    Each result is reduced to the fields listed in PROJECTIONS, free-text fields
+    are trimmed until the result fits `result_tokens`, and the total spent on
+    tool results across the conversation is capped at `conversation_tokens`.
+    Full payloads are kept in memory for the run: get_full() returns them, and
+    the model can page through them by result_id with full_result_tool, which
+    resolves against the projector created last in the calling context.
+    """
+
+    def __init__(self, result_tokens: int = 1500, conversation_tokens: int = 12000, text_tokens: int = 250):
+        self.result_tokens = result_tokens
+        self.conversation_tokens = conversation_tokens
+        self.text_tokens = text_tokens
+        self.used_tokens = 0
+        self._store = {}
+        self._ids = itertools.count(1)
+        # Tool executors copy the caller's context, so full_result_tool sees this run's projector
+        _current_projector.set(self)
+
+    def release(self, tokens: int):
+        """
+        Gives back conversation budget freed elsewhere (e.g. by context compaction).
+        """
+        self.used_tokens = max(0, self.used_tokens - tokens)
+
+    def get_full(self, result_id: str):
+        """
+        Returns the unprojected payload stored under result_id.
+        """
+        return self._store[result_id]
+
+    def _project_record(self, record, spec: dict, max_chars: int | None):
+        if not isinstance(record, dict) or "error" in record:
+            return record
+        projected = {}
+        for field in spec["fields"]:
+            value = record.get(field)
+            if value in (None, "", []):
+                continue
+            if field == "authors" and isinstance(value, list) and len(value) > MAX_AUTHORS:
+                value = value[:MAX_AUTHORS] + ["et al."]
+            if field in spec["text_fields"] and isinstance(value, str):
+                if max_chars == 0:
+                    continue
+                value = _trim(value, max_chars)
+            projected[field] = value
+        return projected
+
+    def project(self, tool_name: str, result):
+        """
+        Returns a compact, budgeted version of `result` for the message history.
+
+        Unknown tools and results that are nothing but errors are passed
+        through unchanged; in partial results only the error records are kept verbatim.
+        """
+        spec = PROJECTIONS.get(tool_name)
+        if spec is None or not isinstance(result, list) or is_failed_result(result):
+            return result
+
+        result_id = f"{tool_name}:{next(self._ids)}"
+        self._store[result_id] = result
+
+        remaining = self.conversation_tokens - self.used_tokens
+        budget = max(0, min(spec.get("result_tokens", self.result_tokens), remaining))
+
+        # Halve the free-text allowance until the result fits; as a last resort
+        # drop free text entirely and keep only citation fields.
+        max_chars = spec.get("text_tokens", self.text_tokens) * CHARS_PER_TOKEN
+        while True:
+            records = [self._project_record(record, spec, max_chars) for record in result]
+            projected = {"result_id": result_id, "results": records}
+            if max_chars == 0 or estimate_tokens(projected) <= budget:
+                break
+            max_chars = max_chars // 2 if max_chars > 64 else 0
+
+        # Tell the model when text was cut; full_result_tool returns the untrimmed records.
+        if any(
+            isinstance(original, dict) and original.get(field) != record.get(field)
+            for original, record in zip(result, records)
+            if isinstance(record, dict) and "error" not in record
+            for field in spec["text_fields"]
+            if original.get(field)
+        ):
+            projected["truncated"] = True
+        self.used_tokens += estimate_tokens(projected)
+        return projected
+
+
+def full_result_tool(result_id: str, start: int = 0, count: int = 3) -> list[dict]:
+    """
+    Returns untrimmed records of an earlier, truncated tool result.
+
+    Args:
+        result_id (str): The result_id of the projected result.
+        start (int): Index of the first record (in the order they were shown).
+        count (int): Number of records, at most MAX_FULL_RECORDS.
+
+    Returns:
+        list[dict]: The full records, or a single {"error": ...} record.
+    """
+    projector = _current_projector.get()
+    if projector is None:
+        return [{"error": "No tool results are stored for this run."}]
+    try:
+        result = projector.get_full(result_id)
+        start, count = int(start), int(count)
+    except KeyError:
+        return [{"error": f"Unknown result_id {result_id!r}."}]
+    except (TypeError, ValueError) as e:
+        return [{"error": str(e)}]
+    count = max(1, min(count, MAX_FULL_RECORDS))
+    return result[max(0, start):max(0, start) + count]
+
+
+full_result_tool_def = {
+    "type": "function",
+    "function": {
+        "name": "full_result_tool",
+        "description": (
+            "Fetches the untrimmed records of an earlier tool result that was marked truncated "
+            "(or compacted), by its result_id. Use it only when the shortened text is not enough."
+        ),
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "result_id": {
+                    "type": "string",
+                    "description": "The result_id of the earlier tool result.",
+                },
+                "start": {
+                    "type": "integer",
+                    "description": "Index of the first record to fetch.",
+                    "default": 0,
+                },
+                "count": {
+                    "type": "integer",
+                    "description": f"Number of records to fetch (at most {MAX_FULL_RECORDS}).",
+                    "default": 3,
+                },
+            },
+            "required": ["result_id"],
+        },
+    },
+}
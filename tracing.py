@@ -0,0 +1,337 @@
+# ================================
+# Standard library imports
+# ================================
+import bisect
+import contextvars
+import functools
+import inspect
+import json
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+
+# Latency buckets (seconds) for the span histograms
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120)
+
+_current_span = contextvars.ContextVar("current_span", default=None)
+
+
+class Histogram:
+    """
+    Cumulative-bucket histogram plus a bounded window of recent samples, so it
+    can be exported to Prometheus and still answer p50/p99 questions locally.
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS, window: int = 10_000):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self.samples = deque(maxlen=window)
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+        self.samples.append(value)
+
+    def quantile(self, q: float) -> float | None:
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class MetricsRegistry:
+    """
+    In-process counters and histograms, keyed on (metric name, labels).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms = {}
+        self._counters = {}
+
+    @staticmethod
+    def _key(name: str, labels: dict) -> tuple:
+        return name, tuple(sorted(labels.items()))
+
+    def observe(self, name: str, value: float, **labels):
+        with self._lock:
+            key = self._key(name, labels)
+            if key not in self._histograms:
+                self._histograms[key] = Histogram()
+            self._histograms[key].observe(value)
+
+    def inc(self, name: str, value: float = 1, **labels):
+        with self._lock:
+            key = self._key(name, labels)
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def set(self, name: str, value: float, **labels):
+        """
+        Sets a gauge-style value (exported like a counter, without _total).
+        """
+        with self._lock:
+            self._counters[self._key(name, labels)] = value
+
+    def quantiles(self, name: str, qs=(0.5, 0.99)) -> dict:
+        """
+        Returns {labels: {q: seconds}} for every label set of a histogram.
+        """
+        with self._lock:
+            return {
+                labels: {q: hist.quantile(q) for q in qs}
+                for (metric, labels), hist in self._histograms.items()
+                if metric == name
+            }
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+
+    def to_prometheus(self) -> str:
+        """
+        Renders every metric in the Prometheus text exposition format.
+        """
+
+        def fmt(labels, extra=()):
+            pairs = list(labels) + list(extra)
+            if not pairs:
+                return ""
+            return "{" + ",".join(f'{k}="{v}"' for k, v in pairs) + "}"
+
+        lines = []
+        with self._lock:
+            for name in sorted({metric for metric, _ in self._counters}):
+                kind = "counter" if name.endswith("_total") else "gauge"
+                lines.append(f"# TYPE {name} {kind}")
+                for (metric, labels), value in sorted(self._counters.items()):
+                    if metric == name:
+                        lines.append(f"{name}{fmt(labels)} {value}")
+            for name in sorted({metric for metric, _ in self._histograms}):
+                lines.append(f"# TYPE {name} histogram")
+                for (metric, labels), hist in sorted(self._histograms.items()):
+                    if metric != name:
+                        continue
+                    cumulative = 0
+                    for bound, count in zip(hist.buckets + ("+Inf",), hist.counts):
+                        cumulative += count
+                        lines.append(f"{name}_bucket{fmt(labels, [('le', bound)])} {cumulative}")
+                    lines.append(f"{name}_sum{fmt(labels)} {hist.sum}")
+                    lines.append(f"{name}_count{fmt(labels)} {hist.count}")
+        return "\n".join(lines) + "\n"
+
+
+METRICS = MetricsRegistry()
+
+
+class Span:
+    def __init__(self, name: str, trace_id: str, parent_id: str | None, attrs: dict):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent_id
+        self.attrs = attrs
+        self.start = time.time()
+        self.started = time.perf_counter()
+        # Set by until_consumed(): the span ends when its stream is exhausted
+        self.deferred = False
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+
+class Tracer:
+    """
+    Writes finished spans as JSON lines (when `path` is set) and feeds their
+    durations, token counts and cache hits into a MetricsRegistry.
+    """
+
+    def __init__(self, path: str | None = None, metrics: MetricsRegistry = METRICS):
+        self.path = path
+        self.metrics = metrics
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def span(self, name: str, **attrs):
+        parent = _current_span.get()
+        trace_id = parent.trace_id if parent else uuid.uuid4().hex[:16]
+        span = Span(name, trace_id, parent.span_id if parent else None, attrs)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.set(error=f"{type(e).__name__}: {e}")
+            raise
+        finally:
+            _current_span.reset(token)
+            # A span handed to until_consumed() ends when its stream does
+            if not span.deferred:
+                self._finish(span, time.perf_counter() - span.started)
+
+    def _finish(self, span: Span, duration: float):
+        labels = {"span": span.name}
+        if "tool" in span.attrs:
+            labels["tool"] = span.attrs["tool"]
+        self.metrics.observe("research_agent_span_seconds", duration, **labels)
+        for kind in ("prompt_tokens", "completion_tokens"):
+            if span.attrs.get(kind):
+                self.metrics.inc("research_agent_tokens_total", span.attrs[kind], kind=kind, **labels)
+        if "cache_hit" in span.attrs:
+            outcome = "hit" if span.attrs["cache_hit"] else "miss"
+            self.metrics.inc("research_agent_cache_lookups_total", outcome=outcome, **labels)
+
+        if not self.path:
+            return
+        record = {
+            "trace_id": span.trace_id,
+            "span_id": span.span_id,
+            "parent_id": span.parent_id,
+            "name": span.name,
+            "start": span.start,
+            "duration_s": round(duration, 6),
+            **span.attrs,
+        }
+        with self._lock, open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, default=str) + "\n")
+
+
+# Process-wide tracer; set TRACE_FILE to also write spans to a JSONL file
+TRACER = Tracer(path=os.getenv("TRACE_FILE"))
+
+
+def span(name: str, **attrs):
+    return TRACER.span(name, **attrs)
+
+
+def annotate(**attrs):
+    """
+    Adds attributes to the current span, if any (e.g. cache_hit=True).
+    """
+    current = _current_span.get()
+    if current is not None:
+        current.set(**attrs)
+
+
+def until_consumed(iterable):
+    """
+    Keeps the current span open until `iterable` has been read (or closed)
+    instead of ending it when the function that returns the stream returns,
+    so streamed stages report the time until their last chunk.
+
+    Returns:
+        A generator over `iterable`, or `iterable` itself outside any span.
+    """
+    current = _current_span.get()
+    if current is None:
+        return iterable
+    current.deferred = True
+    return _consume(iterable, current, TRACER)
+
+
+def _consume(iterable, span: Span, tracer: Tracer):
+    try:
+        yield from iterable
+    except GeneratorExit:
+        raise
+    except BaseException as e:
+        span.set(error=f"{type(e).__name__}: {e}")
+        raise
+    finally:
+        tracer._finish(span, time.perf_counter() - span.started)
+
+
+def traced(name: str):
+    """
+    Decorator that runs a function (sync or async) inside a span.
+    """
+
+    def decorator(func):
+        if inspect.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with span(name):
+                    return await func(*args, **kwargs)
+
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def payload_size(value) -> int:
+    """
+    Size in characters of a value once serialized the way it is sent to the model.
+    """
+    if isinstance(value, str):
+        return len(value)
+    return len(json.dumps(value, default=lambda o: o.model_dump() if hasattr(o, "model_dump") else str(o)))
+
+
+def _llm_attrs(request: dict) -> dict:
+    messages = request.get("messages", [])
+    return {
+        "model": request.get("model"),
+        "turn": sum(
+            1 for m in messages
+            if (m.get("role") if isinstance(m, dict) else getattr(m, "role", None)) == "assistant"
+        ),
+        "request_chars": payload_size(messages),
+    }
+
+
+def _record_usage(current: Span, response):
+    usage = getattr(response, "usage", None)
+    if usage is not None:
+        current.set(prompt_tokens=usage.prompt_tokens, completion_tokens=usage.completion_tokens)
+    choices = getattr(response, "choices", None)
+    if choices:
+        message = choices[0].message
+        current.set(
+            response_chars=len(message.content or ""),
+            tool_calls=len(message.tool_calls or []),
+        )
+
+
+def install(client):
+    """
+    Wraps client.chat.completions.create (sync or async) so every LLM call is
+    recorded as an "llm_call" span with token usage and payload sizes.
+    """
+    completions = client.chat.completions
+    create = completions.create
+
+    if inspect.iscoroutinefunction(create):
+
+        @functools.wraps(create)
+        async def traced_create(**request):
+            with span("llm_call", **_llm_attrs(request)) as current:
+                response = await create(**request)
+                if not request.get("stream"):
+                    _record_usage(current, response)
+                return response
+
+    else:
+
+        @functools.wraps(create)
+        def traced_create(**request):
+            with span("llm_call", **_llm_attrs(request)) as current:
+                response = create(**request)
+                if not request.get("stream"):
+                    _record_usage(current, response)
+                return response
+
+    completions.create = traced_create
+    return client